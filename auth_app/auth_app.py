@@ -1,60 +1,186 @@
+from connection_pool import ConnectionPool
+from passwords import PasswordHasher
+from membership import EmailIndex
+from ui_metrics import UpdateMetrics
+from write_behind import WriteBehindQueue
+from migrations import ensure_schema, NOW
+from concurrent.futures import ThreadPoolExecutor, Future
 import flet as ft
-import pandas as pd
+import logging
+import asyncio
 import sqlite3
 import os
 import re
 
 db_path = os.path.join(os.path.dirname(__file__), "auth.db")
+pool = ConnectionPool(db_path)
+hasher = PasswordHasher()
+email_index = EmailIndex()
+write_behind = None
 email_pattern = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
+logger = logging.getLogger("auth_app")
+
+def use_database(path):
+    global db_path, pool, email_index, write_behind
+    if write_behind is not None:
+        write_behind.close()
+        write_behind = None
+    pool.close_all()
+    db_path = path
+    pool = ConnectionPool(path)
+    email_index = EmailIndex()
+
+def enable_write_behind(durability="normal", **options):
+    # Qué garantiza cada modo de durabilidad está explicado en write_behind.py.
+    global write_behind
+    if write_behind is None:
+        write_behind = WriteBehindQueue(pool, durability, **options)
+    return write_behind
+
+def submit_write(sql, params):
+    if write_behind is not None:
+        return write_behind.submit(sql, params)
+    future = Future()
+    try:
+        with pool.transaction() as db:
+            future.set_result(db.execute(sql, params).rowcount)
+    except Exception as ex:
+        future.set_exception(ex)
+    return future
+
+def iter_chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
 class Database:
     @staticmethod
     def connect_to_database():
-        with sqlite3.connect(db_path) as db:
-            db.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY,
-                    email VARCHAR(255) NOT NULL UNIQUE,
-                    password VARCHAR(255) NOT NULL
-                )
-            """)
-            db.commit()
+        ensure_schema(db_path, pool.connection())
+        if not email_index.loaded:
+            Database.load_email_index()
+
+    @staticmethod
+    def load_email_index(force=True):
+        def scan():
+            db = pool.connection()
+            # La versión se toma antes de recorrer la tabla: un commit que
+            # llegue durante el recorrido deja el filtro sin confirmar
+            version = pool.data_version()
+            count = db.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+            return version, count, (email for email, in db.execute("SELECT email FROM users"))
+        email_index.rebuild(scan, force)
 
     @staticmethod
     def read_database():
-        with sqlite3.connect(db_path) as db:
-            df = pd.read_sql_query("SELECT email, password FROM users", db)
-        return df.values.tolist()
+        return [list(row) for row in Database.iter_users()]
+
+    @staticmethod
+    def iter_users(batch_size=1000):
+        cursor = pool.connection().execute("SELECT email, password FROM users ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
 
     @staticmethod
     def insert_into_database(values):
-        with sqlite3.connect(db_path) as db:
-            df = pd.DataFrame([values], columns=["email", "password"])
-            df.to_sql("users", db, if_exists="append", index=False)
+        Database.submit_insert(values).result()
+
+    @staticmethod
+    def submit_insert(values):
+        future = submit_write("INSERT INTO users (email, password) VALUES (?, ?)", values)
+        future.add_done_callback(lambda f: f.exception() or Database._indexed_insert(values[0]))
+        return future
+
+    @staticmethod
+    def _indexed_insert(email):
+        email_index.add(email)
+        Database.load_email_index(force=False)
+
+    @staticmethod
+    def import_users(rows, chunk_size=5000, on_duplicate=None):
+        inserted = duplicates = 0
+        for chunk in iter_chunks(rows, chunk_size):
+            with pool.transaction() as db:
+                existing = Database._existing_emails(db, [email for email, _ in chunk])
+                batch = []
+                for email, password in chunk:
+                    if email.lower() in existing:
+                        duplicates += 1
+                        if on_duplicate:
+                            on_duplicate(email)
+                        continue
+                    existing.add(email.lower())
+                    batch.append((email, password))
+                db.executemany("INSERT INTO users (email, password) VALUES (?, ?)", batch)
+            for email, _ in batch:
+                email_index.add(email)
+            inserted += len(batch)
+        Database.load_email_index(force=False)
+        return inserted, duplicates
+
+    @staticmethod
+    def _existing_emails(db, emails):
+        found = set()
+        # Cada lista IN queda por debajo del límite de parámetros por defecto de SQLite.
+        for start in range(0, len(emails), 500):
+            part = emails[start:start + 500]
+            placeholders = ",".join("?" * len(part))
+            cursor = db.execute(f"SELECT email FROM users WHERE email IN ({placeholders})", part)
+            found.update(email.lower() for email, in cursor)
+        return found
 
     @staticmethod
     def check_email_exists(email):
-        with sqlite3.connect(db_path) as db:
-            cursor = db.cursor()
-            cursor.execute("SELECT 1 FROM users WHERE email=?", (email,))
-            return cursor.fetchone() is not None
+        return Database.get_user_by_email(email) is not None
 
     @staticmethod
     def get_user_by_email(email):
-        with sqlite3.connect(db_path) as db:
-            cursor = db.cursor()
-            cursor.execute("SELECT email FROM users WHERE email=?", (email,))
-            return cursor.fetchone()
+        if not email_index.might_contain(email) and email_index.is_current(pool.data_version()):
+            return None
+        user = email_index.lookup(email)
+        if user is None:
+            cursor = pool.connection().execute("SELECT email, password FROM users WHERE email=?", (email,))
+            user = cursor.fetchone()
+            email_index.remember(email, user)
+            Database.load_email_index(force=False)
+        return user
+
+    @staticmethod
+    def update_password(email, password):
+        submit_write("UPDATE users SET password=? WHERE email=?", (password, email)).result()
+        email_index.remember(email, (email, password))
+
+    @staticmethod
+    def record_login(email):
+        return submit_write(f"UPDATE users SET last_login={NOW} WHERE email=?", (email,))
 
     @staticmethod
     def delete_user_by_email(email):
-        with sqlite3.connect(db_path) as db:
-            db.execute("DELETE FROM users WHERE email=?", (email,))
-            db.commit()
+        Database.submit_delete(email).result()
+
+    @staticmethod
+    def submit_delete(email):
+        future = submit_write("DELETE FROM users WHERE email=?", (email,))
+        future.add_done_callback(lambda f: f.exception() or Database._indexed_delete(email))
+        return future
+
+    @staticmethod
+    def _indexed_delete(email):
+        email_index.discard(email)
+        Database.load_email_index(force=False)
 
 class AuthApp:
     def __init__(self, page: ft.Page):
         self.page = page
+        self.metrics = UpdateMetrics(page, enabled=bool(os.environ.get("AUTH_APP_METRICS")))
         self.setup_page()
         self.setup_ui()
         self.add_to_page()
@@ -68,8 +194,20 @@ class AuthApp:
         self.page.bgcolor = "#6fa8dc"
 
     def setup_ui(self):
+        # Las vistas se construyen la primera vez que se navega a ellas
+        self.views = {}
+        self.current_view = None
+        self.current_email = None
+        self.snack_bar = ft.SnackBar(ft.Text(""))
+
+    def view(self, name):
+        if name not in self.views:
+            self.views[name] = getattr(self, f"build_{name}_view")()
+        return self.views[name]
+
+    def build_reset_password_view(self):
         # Componente de recuperación de contraseña
-        self.reset_password_content = ft.Column(
+        return ft.Column(
             alignment="center",
             controls=[
                 ft.Text("Recover your account", size=26, weight="bold", color="eeeeee"),
@@ -110,6 +248,7 @@ class AuthApp:
             ]
         )
 
+    def build_login_view(self):
         # Componente de inicio de sesión
         self.login_email_field = ft.TextField(
             hint_text="Enter your e-mail",
@@ -131,7 +270,7 @@ class AuthApp:
             width=310,
             height=48,
         )
-        self.login_content = ft.Column(
+        return ft.Column(
             horizontal_alignment="center",
             controls=[
                 ft.Text("Log In", size=28, weight=ft.FontWeight.BOLD, color="#eeeeee"),
@@ -174,6 +313,7 @@ class AuthApp:
             ]
         )
 
+    def build_signup_view(self):
         # Componente de registro
         self.signup_email_field = ft.TextField(
             hint_text="Enter your email",
@@ -206,7 +346,7 @@ class AuthApp:
             width=310,
             height=48,
         )
-        self.signup_content = ft.Column(
+        return ft.Column(
             horizontal_alignment="center",
             controls=[
                 ft.Text("Sign Up", size=28, weight=ft.FontWeight.BOLD, color="#eeeeee"),
@@ -244,12 +384,14 @@ class AuthApp:
             ]
         )
 
-        self.user_profile_content = lambda email: ft.Column(
+    def build_profile_view(self):
+        self.profile_email_text = ft.Text("", color="#ffffff", weight="bold")
+        return ft.Column(
             horizontal_alignment="center",
             controls=[
                 ft.Text("User Profile", size=28, weight=ft.FontWeight.BOLD, color="#eeeeee"),
                 ft.Divider(height=20, color="transparent"),
-                ft.Text(f"Email: {email}", color="#ffffff", weight="bold"),
+                self.profile_email_text,
                 ft.Divider(height=20, color="transparent"),
                 ft.FilledButton(
                     text="Log Out",
@@ -261,7 +403,7 @@ class AuthApp:
                     text="Delete Account",
                     style=ft.ButtonStyle(color="white", bgcolor="red"),
                     width=300,
-                    on_click=lambda e: self.delete_account(email)
+                    on_click=self.delete_clicked
                 ),
             ]
         )
@@ -286,100 +428,284 @@ class AuthApp:
             padding=ft.padding.only(top=40, left=20, right=20),
             content=ft.Column(
                 controls=[
-                    self.login_content
+                    self.view("login")
                 ]
             )
         )
+        self.current_view = "login"
+        self.page.snack_bar = self.snack_bar
         self.page.add(self.main_container)
-        self.page.update()
+        self.metrics.first_paint()
+
+    def navigate(self, name):
+        # Las vistas ya enviadas al cliente solo cambian de visibilidad
+        self.metrics.mark(f"{self.current_view}->{name}")
+        previous = self.views[self.current_view]
+        target = self.view(name)
+        previous.visible = False
+        target.visible = True
+        self.current_view = name
+        if target in self.main_container.content.controls:
+            self.page.update(previous, target)
+        else:
+            self.main_container.content.controls.append(target)
+            self.main_container.content.update()
+
+    def show_message(self, message):
+        # Solo se envía el SnackBar, no un diff de toda la página
+        self.metrics.mark("snack_bar")
+        self.snack_bar.content.value = message
+        self.snack_bar.open = True
+        self.snack_bar.update()
+
+    def on_result(self, handler, failure_message=None):
+        # Una excepción dentro de add_done_callback solo termina en el log de
+        # concurrent.futures: se registra y el usuario recibe un mensaje
+        def done(future):
+            try:
+                handler(future.result())
+            except Exception:
+                logger.exception("auth operation failed")
+                if failure_message:
+                    self.show_message(failure_message)
+        return done
 
     def changeSIPSUP(self, e):
-        if isinstance(self.main_container.content.controls[0], ft.Column) and len(self.main_container.content.controls) == 1:
-            if self.login_content in self.main_container.content.controls:
-                self.main_container.content.controls[0] = self.signup_content
-            else:
-                self.main_container.content.controls[0] = self.login_content
-            self.main_container.update()
-        elif isinstance(self.main_container.content.controls[0], ft.Column) and len(self.main_container.content.controls) > 1:
-            self.main_container.content.controls[0] = self.login_content
-            self.main_container.update()
+        self.navigate("signup" if self.current_view == "login" else "login")
 
     def changeRP(self, e):
-        self.main_container.content.controls[0] = self.reset_password_content
-        self.main_container.update()
+        self.navigate("reset_password")
+
+    def registration_error(self, email, password, confirm_password):
+        if not email or not password or not confirm_password:
+            return "All fields are required!"
+        elif not re.match(email_pattern, email):
+            return "Invalid email format!"
+        elif password != confirm_password:
+            return "Passwords do not match!"
+        return None
+
+    def login_error(self, email, password):
+        if not email or not password:
+            return "All fields are required!"
+        elif not re.match(email_pattern, email):
+            return "Invalid email format!"
+        return None
 
     def register_user(self, e):
         email = self.signup_email_field.value
         password = self.signup_password_field.value
         confirm_password = self.signup_confirm_password_field.value
 
-        if not email or not password or not confirm_password:
-            self.page.snack_bar = ft.SnackBar(ft.Text("All fields are required!"))
-            self.page.snack_bar.open = True
-            self.page.update()
-            return
-        elif not re.match(email_pattern, email):
-            self.page.snack_bar = ft.SnackBar(ft.Text("Invalid email format!"))
-            self.page.snack_bar.open = True
-            self.page.update()
-            return
-        elif password != confirm_password:
-            self.page.snack_bar = ft.SnackBar(ft.Text("Passwords do not match!"))
-            self.page.snack_bar.open = True
-            self.page.update()
+        error = self.registration_error(email, password, confirm_password)
+        if error:
+            self.show_message(error)
             return
         elif Database.check_email_exists(email):
-            self.page.snack_bar = ft.SnackBar(ft.Text("Email already exists. Please log in."))
-            self.page.snack_bar.open = True
-            self.page.update()
+            self.show_message("Email already exists. Please log in.")
             return
         else:
-            Database.insert_into_database((email, password))
-            self.page.snack_bar = ft.SnackBar(ft.Text("Registration successful. Please log in."))
-            self.page.snack_bar.open = True
-            self.page.update()
-            self.changeSIPSUP(e)
+            hasher.hash(password).add_done_callback(self.on_result(
+                lambda password_hash: self.finish_registration(email, password_hash),
+                "Registration failed. Please try again.",
+            ))
+
+    def finish_registration(self, email, password_hash):
+        Database.submit_insert((email, password_hash)).add_done_callback(
+            lambda future: self.registration_done(future.exception())
+        )
+
+    def registration_done(self, error):
+        if isinstance(error, sqlite3.IntegrityError):
+            self.show_message("Email already exists. Please log in.")
+            return
+        elif error is not None:
+            # Base bloqueada, disco lleno, fallo del escritor... corre dentro
+            # de add_done_callback, así que relanzarla no llegaría a nadie
+            logger.error("registration write failed", exc_info=error)
+            self.show_message("Registration failed. Please try again.")
+            return
+        self.navigate("login")
+        self.show_message("Registration successful. Please log in.")
 
     def login_user(self, e):
         email = self.login_email_field.value
         password = self.login_password_field.value
 
-        if not email or not password:
-            self.page.snack_bar = ft.SnackBar(ft.Text("All fields are required!"))
-            self.page.snack_bar.open = True
-            self.page.update()
-            return
-        elif not re.match(email_pattern, email):
-            self.page.snack_bar = ft.SnackBar(ft.Text("Invalid email format!"))
-            self.page.snack_bar.open = True
-            self.page.update()
+        error = self.login_error(email, password)
+        if error:
+            self.show_message(error)
             return
 
         user = Database.get_user_by_email(email)
-        if user and user[0] == email:
-            self.page.snack_bar = ft.SnackBar(ft.Text("Login successful."))
-            self.page.snack_bar.open = True
-            self.page.update()
+        if user is None:
+            self.show_message("Invalid email or password.")
+            return
+
+        stored = user[1]
+        hasher.verify(password, stored).add_done_callback(self.on_result(
+            lambda valid: self.finish_login(email, password, stored, valid),
+            "Login failed. Please try again.",
+        ))
+
+    def finish_login(self, email, password, stored, valid):
+        if valid:
+            if hasher.needs_rehash(stored):
+                # Si falla el rehash se conserva el hash anterior: solo va al log
+                hasher.hash(password).add_done_callback(self.on_result(
+                    lambda password_hash: Database.update_password(email, password_hash)
+                ))
+            Database.record_login(email)
             self.show_user_profile(email)
+            self.show_message("Login successful.")
         else:
-            self.page.snack_bar = ft.SnackBar(ft.Text("Invalid email or password."))
-            self.page.snack_bar.open = True
-            self.page.update()
+            self.show_message("Invalid email or password.")
 
     def show_user_profile(self, email):
-        self.main_container.content.controls[0] = self.user_profile_content(email)
-        self.main_container.update()
+        self.current_email = email
+        self.view("profile")
+        self.profile_email_text.value = f"Email: {email}"
+        if self.current_view == "profile":
+            self.profile_email_text.update()
+        else:
+            self.navigate("profile")
+
+    def delete_clicked(self, e):
+        self.delete_account(self.current_email)
 
     def delete_account(self, email):
         Database.delete_user_by_email(email)
-        self.page.snack_bar = ft.SnackBar(ft.Text("Account deleted successfully."))
-        self.page.snack_bar.open = True
-        self.page.update()
-        self.changeSIPSUP(None)
+        self.navigate("login")
+        self.show_message("Account deleted successfully.")
+
+class AsyncDatabase:
+    # Las lecturas corren en un pool chico; todas las escrituras pasan por un
+    # único hilo escritor, así las sesiones no compiten por el lock de SQLite.
+    def __init__(self, read_workers=4):
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="auth-db-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="auth-db-write")
+
+    async def _run(self, executor, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+
+    async def connect_to_database(self):
+        await self._run(self._writer, Database.connect_to_database)
+
+    async def check_email_exists(self, email):
+        return await self._run(self._readers, Database.check_email_exists, email)
+
+    async def get_user_by_email(self, email):
+        return await self._run(self._readers, Database.get_user_by_email, email)
+
+    async def insert_into_database(self, values):
+        if write_behind is not None:
+            await asyncio.wrap_future(Database.submit_insert(values))
+        else:
+            await self._run(self._writer, Database.insert_into_database, values)
+
+    async def update_password(self, email, password):
+        await self._run(self._writer, Database.update_password, email, password)
+
+    async def record_login(self, email):
+        if write_behind is not None:
+            await asyncio.wrap_future(Database.record_login(email))
+        else:
+            await self._run(self._writer, Database.record_login, email)
+
+    async def delete_user_by_email(self, email):
+        if write_behind is not None:
+            await asyncio.wrap_future(Database.submit_delete(email))
+        else:
+            await self._run(self._writer, Database.delete_user_by_email, email)
+
+async_database = AsyncDatabase()
+# asyncio solo guarda referencias débiles a las tareas: estas las mantienen vivas
+background_tasks = set()
+
+class AsyncAuthApp(AuthApp):
+    async def register_user(self, e):
+        email = self.signup_email_field.value
+        password = self.signup_password_field.value
+        confirm_password = self.signup_confirm_password_field.value
+
+        error = self.registration_error(email, password, confirm_password)
+        if error:
+            self.show_message(error)
+            return
+        elif await async_database.check_email_exists(email):
+            self.show_message("Email already exists. Please log in.")
+            return
+
+        password_hash = await asyncio.wrap_future(hasher.hash(password))
+        try:
+            await async_database.insert_into_database((email, password_hash))
+        except sqlite3.IntegrityError:
+            self.show_message("Email already exists. Please log in.")
+            return
+        except Exception:
+            logger.exception("registration write failed")
+            self.show_message("Registration failed. Please try again.")
+            return
+        self.navigate("login")
+        self.show_message("Registration successful. Please log in.")
+
+    async def login_user(self, e):
+        email = self.login_email_field.value
+        password = self.login_password_field.value
+
+        error = self.login_error(email, password)
+        if error:
+            self.show_message(error)
+            return
+
+        user = await async_database.get_user_by_email(email)
+        if user is None or not await asyncio.wrap_future(hasher.verify(password, user[1])):
+            self.show_message("Invalid email or password.")
+            return
+
+        if hasher.needs_rehash(user[1]):
+            # Como en el modo sync, el rehash no demora el login
+            task = asyncio.create_task(self.rehash(email, password))
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
+        await async_database.record_login(email)
+        self.show_user_profile(email)
+        self.show_message("Login successful.")
+
+    async def rehash(self, email, password):
+        # Si falla se conserva el hash anterior: solo va al log
+        try:
+            password_hash = await asyncio.wrap_future(hasher.hash(password))
+            await async_database.update_password(email, password_hash)
+        except Exception:
+            logger.exception("auth operation failed")
+
+    async def delete_clicked(self, e):
+        await self.delete_account(self.current_email)
+
+    async def delete_account(self, email):
+        await async_database.delete_user_by_email(email)
+        self.navigate("login")
+        self.show_message("Account deleted successfully.")
+
+def configure_write_behind():
+    # AUTH_APP_WRITE_BEHIND=full|normal|off activa los commits agrupados
+    durability = os.environ.get("AUTH_APP_WRITE_BEHIND")
+    if durability:
+        enable_write_behind(durability)
 
 def main(page: ft.Page):
-    app = AuthApp(page)
     Database.connect_to_database()
+    configure_write_behind()
+    AuthApp(page)
+
+async def async_main(page: ft.Page):
+    await async_database.connect_to_database()
+    configure_write_behind()
+    AsyncAuthApp(page)
 
 if __name__ == "__main__":
-    ft.app(target=main)
\ No newline at end of file
+    # El esquema se migra una sola vez al arrancar, antes de que se conecte una sesión
+    Database.connect_to_database()
+    # AUTH_APP_MODE=async elige los handlers de asyncio y la fachada de base de datos
+    ft.app(target=async_main if os.environ.get("AUTH_APP_MODE") == "async" else main)
\ No newline at end of file
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+from connection_pool import ConnectionPool
+import argparse
+import tempfile
+import sqlite3
+import shutil
+import time
+import os
+
+db_path = os.path.join(os.path.dirname(__file__), "auth.db")
+
+# Imita un clic en register_user: una consulta de existencia y un insert,
+# más el delete correspondiente para que la tabla no cambie de tamaño.
+def legacy_register(path, email):
+    with sqlite3.connect(path) as db:
+        exists = db.execute("SELECT 1 FROM users WHERE email=?", (email,)).fetchone()
+    if exists is None:
+        with sqlite3.connect(path) as db:
+            db.execute("INSERT INTO users (email, password) VALUES (?, ?)", (email, "x"))
+            db.commit()
+    with sqlite3.connect(path) as db:
+        db.execute("DELETE FROM users WHERE email=?", (email,))
+        db.commit()
+
+def pooled_register(pool, email):
+    exists = pool.connection().execute("SELECT 1 FROM users WHERE email=?", (email,)).fetchone()
+    if exists is None:
+        with pool.transaction() as db:
+            db.execute("INSERT INTO users (email, password) VALUES (?, ?)", (email, "x"))
+    with pool.transaction() as db:
+        db.execute("DELETE FROM users WHERE email=?", (email,))
+
+def run(register, target, operations, threads):
+    def worker(offset):
+        for i in range(offset, operations, threads):
+            register(target, f"bench{i}@example.com")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(worker, range(threads)))
+    return operations / (time.perf_counter() - start)
+
+def scratch_copy(directory, name):
+    path = os.path.join(directory, name)
+    shutil.copyfile(db_path, path)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call connections vs. ConnectionPool throughput")
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for threads in args.threads:
+            legacy = run(legacy_register, scratch_copy(directory, "legacy.db"), args.operations, threads)
+
+            pool = ConnectionPool(scratch_copy(directory, "pooled.db"))
+            pooled = run(pooled_register, pool, args.operations, threads)
+            pool.close_all()
+
+            print(f"threads={threads:<3} per-call: {legacy:9.1f} ops/s   pooled: {pooled:9.1f} ops/s   "
+                  f"speedup: {pooled / legacy:5.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from concurrent.futures import wait
+from passwords import PasswordHasher, calibrate, time_hash, load_cost, save_cost, cost_path
+import argparse
+import time
+
+def concurrent_throughput(cost, workers, logins):
+    hasher = PasswordHasher(cost, max_workers=workers)
+    stored = hasher.hash("benchmark").result()
+    start = time.perf_counter()
+    wait([hasher.verify("benchmark", stored) for _ in range(logins)])
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+    return logins / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick scrypt cost parameters for a target login latency")
+    parser.add_argument("--target-ms", type=float, default=100)
+    parser.add_argument("-r", type=int, default=8)
+    parser.add_argument("-p", type=int, default=1)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--logins", type=int, default=32, help="verifications per throughput run")
+    parser.add_argument("--write", action="store_true", help=f"save the result to {cost_path}")
+    args = parser.parse_args()
+
+    current = load_cost()
+    cost = calibrate(args.target_ms, args.r, args.p)
+    print(f"current: n={current['n']} r={current['r']} p={current['p']} "
+          f"({time_hash(current['n'], current['r'], current['p']) * 1000:.1f} ms)")
+    print(f"chosen:  n={cost['n']} r={cost['r']} p={cost['p']} "
+          f"({time_hash(cost['n'], cost['r'], cost['p']) * 1000:.1f} ms, "
+          f"{128 * cost['r'] * cost['n'] // 1024} KiB per hash)")
+
+    for workers in args.workers:
+        rate = concurrent_throughput(cost, workers, args.logins)
+        print(f"workers={workers:<3} {rate:8.1f} logins/s")
+
+    if args.write:
+        save_cost(cost)
+        print(f"Saved to {cost_path}; existing hashes are upgraded on next login.")
+
+if __name__ == "__main__":
+    main()
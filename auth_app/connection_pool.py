@@ -0,0 +1,73 @@
+from contextlib import contextmanager
+import threading
+import sqlite3
+
+# WAL deja leer mientras un escritor confirma; NORMAL sobrevive a una caída
+# de la aplicación y solo arriesga los últimos commits si se corta la luz.
+DEFAULT_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("busy_timeout", 5000),
+    ("cache_size", -8000),
+    ("temp_store", "MEMORY"),
+)
+
+class ConnectionPool:
+    def __init__(self, path, pragmas=DEFAULT_PRAGMAS, cached_statements=128):
+        self.path = path
+        self.pragmas = pragmas
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._probe = None
+        self._probe_lock = threading.Lock()
+
+    def _connect(self):
+        # La caché de sentencias mantiene vivas las consultas preparadas del
+        # hilo mientras dure la conexión, indexadas por el texto SQL.
+        db = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        for name, value in self.pragmas:
+            db.execute(f"PRAGMA {name}={value}")
+        return db
+
+    def _open(self):
+        db = self._connect()
+        with self._lock:
+            self._connections.append(db)
+        return db
+
+    def connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self._open()
+        return db
+
+    @contextmanager
+    def transaction(self):
+        db = self.connection()
+        with db:
+            yield db
+
+    def data_version(self):
+        # Se lee en una conexión aparte que nunca escribe, así que cambia con
+        # cada commit de cualquier otra conexión, de este proceso o de otro
+        with self._probe_lock:
+            if self._probe is None:
+                self._probe = self._connect()
+            return self._probe.execute("PRAGMA data_version").fetchone()[0]
+
+    def close_all(self):
+        with self._probe_lock:
+            if self._probe is not None:
+                self._probe.close()
+                self._probe = None
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for db in connections:
+            db.close()
+        self._local = threading.local()
@@ -0,0 +1,201 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from flet_core.protocol import PageCommandsBatchResponsePayload, PageCommandResponsePayload
+from flet_core.connection import Connection
+from collections import Counter
+import auth_app
+import flet as ft
+import threading
+import argparse
+import tempfile
+import asyncio
+import sqlite3
+import shutil
+import time
+import os
+
+class NullConnection(Connection):
+    # Acepta todas las actualizaciones sin cliente; los controles nuevos reciben ids correlativos.
+    def __init__(self):
+        super().__init__()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def send_commands(self, session_id, commands):
+        results = []
+        with self._lock:
+            for command in commands:
+                if command.name == "add":
+                    ids = range(self._next_id, self._next_id + len(command.commands))
+                    self._next_id += len(command.commands)
+                    results.append(" ".join(f"_{i}" for i in ids))
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+    def send_command(self, session_id, command):
+        return PageCommandResponsePayload(result="", error="")
+
+def fake_page(session_id):
+    return ft.Page(NullConnection(), session_id, asyncio.new_event_loop())
+
+class SessionProbe:
+    # Todos los handlers terminan con show_message: un mensaje marca el final.
+    def setup_ui(self):
+        super().setup_ui()
+        self.done = threading.Event()
+        self.last_message = None
+
+    def show_message(self, message):
+        super().show_message(message)
+        self.last_message = message
+        self.done.set()
+
+class LoadSession(SessionProbe, auth_app.AuthApp):
+    pass
+
+class AsyncLoadSession(SessionProbe, auth_app.AsyncAuthApp):
+    pass
+
+EXPECTED = {
+    "register": "Registration successful. Please log in.",
+    "login": "Login successful.",
+    "delete": "Account deleted successfully.",
+}
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {action: [] for action in EXPECTED}
+        self.errors = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, action, elapsed, message=None, error=None):
+        with self._lock:
+            if error is not None:
+                locked = isinstance(error, sqlite3.OperationalError) and (
+                    "locked" in str(error) or "busy" in str(error)
+                )
+                self.errors["sqlite_busy" if locked else type(error).__name__] += 1
+            elif message != EXPECTED[action]:
+                self.errors[f"{action}: {message}"] += 1
+            else:
+                self.latencies[action].append(elapsed)
+
+def fill_forms(session, email):
+    session.view("signup")
+    session.signup_email_field.value = email
+    session.signup_password_field.value = "load-test-password"
+    session.signup_confirm_password_field.value = "load-test-password"
+    session.login_email_field.value = email
+    session.login_password_field.value = "load-test-password"
+
+def run_sync_session(name, iterations, recorder, timeout):
+    session = LoadSession(fake_page(name))
+    handlers = {"register": session.register_user, "login": session.login_user, "delete": session.delete_clicked}
+    for i in range(iterations):
+        fill_forms(session, f"{name}-{i}@example.com")
+        for action, handler in handlers.items():
+            session.done.clear()
+            start = time.perf_counter()
+            try:
+                handler(None)
+                if not session.done.wait(timeout):
+                    raise TimeoutError(action)
+            except Exception as ex:
+                recorder.add(action, 0, error=ex)
+                break
+            recorder.add(action, time.perf_counter() - start, session.last_message)
+
+async def run_async_session(name, iterations, recorder):
+    session = AsyncLoadSession(fake_page(name))
+    handlers = {"register": session.register_user, "login": session.login_user, "delete": session.delete_clicked}
+    for i in range(iterations):
+        fill_forms(session, f"{name}-{i}@example.com")
+        for action, handler in handlers.items():
+            start = time.perf_counter()
+            try:
+                await handler(None)
+            except Exception as ex:
+                recorder.add(action, 0, error=ex)
+                break
+            recorder.add(action, time.perf_counter() - start, session.last_message)
+
+def run_worker(db, mode, worker, sessions, iterations, kdf_n, timeout, durability):
+    auth_app.use_database(db)
+    auth_app.Database.connect_to_database()
+    if durability:
+        auth_app.enable_write_behind(durability)
+    if kdf_n:
+        auth_app.hasher.cost = {**auth_app.hasher.cost, "n": kdf_n}
+    recorder = Recorder()
+    names = [f"load-{worker}-{session}" for session in range(sessions)]
+    start = time.perf_counter()
+    if mode == "async":
+        async def run_all():
+            await asyncio.gather(*(run_async_session(name, iterations, recorder) for name in names))
+        asyncio.run(run_all())
+    else:
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            list(executor.map(lambda name: run_sync_session(name, iterations, recorder, timeout), names))
+    elapsed = time.perf_counter() - start
+    group_commits = Counter()
+    if auth_app.write_behind is not None:
+        group_commits.update(commits=auth_app.write_behind.commits, writes=auth_app.write_behind.writes)
+        auth_app.use_database(db)
+    return recorder.latencies, recorder.errors, elapsed, group_commits
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def report(latencies, errors, elapsed):
+    total = sum(len(values) for values in latencies.values())
+    print(f"{total} successful operations in {elapsed:.2f}s ({total / elapsed:.1f} ops/s)")
+    for action, values in latencies.items():
+        values.sort()
+        print(f"  {action:<9} n={len(values):<6} "
+              + "  ".join(f"p{int(q * 100)}={percentile(values, q) * 1000:7.1f}ms" for q in (0.5, 0.9, 0.99))
+              + f"  max={(values[-1] if values else float('nan')) * 1000:7.1f}ms")
+    print(f"  sqlite busy/locked errors: {errors.pop('sqlite_busy', 0)}")
+    for error, count in errors.most_common():
+        print(f"  {error}: {count}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless register/login/delete load test for auth_app")
+    parser.add_argument("--sessions", type=int, default=10, help="virtual sessions per process")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=5, help="register/login/delete cycles per session")
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--kdf-n", type=int, help="override the scrypt n cost to isolate database load")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--write-behind", choices=["full", "normal", "off"],
+                        help="queue writes into group commits with this durability mode")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = os.path.join(directory, "auth.db")
+        shutil.copyfile(auth_app.db_path, db)
+        worker_args = [(db, args.mode, worker, args.sessions, args.iterations, args.kdf_n, args.timeout,
+                        args.write_behind)
+                       for worker in range(args.processes)]
+        if args.processes == 1:
+            results = [run_worker(*worker_args[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=args.processes) as executor:
+                results = list(executor.map(run_worker, *zip(*worker_args)))
+
+    latencies = {action: [] for action in EXPECTED}
+    errors = Counter()
+    group_commits = Counter()
+    for worker_latencies, worker_errors, _, worker_group_commits in results:
+        for action, values in worker_latencies.items():
+            latencies[action].extend(values)
+        errors.update(worker_errors)
+        group_commits.update(worker_group_commits)
+    print(f"mode={args.mode} processes={args.processes} sessions/process={args.sessions} "
+          f"write-behind={args.write_behind or 'off'}")
+    report(latencies, errors, max(elapsed for _, _, elapsed, _ in results))
+    if group_commits["commits"]:
+        print(f"  {group_commits['writes']} write(s) in {group_commits['commits']} group commit(s)")
+    auth_app.hasher.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+from collections import OrderedDict
+import threading
+import hashlib
+import math
+import time
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+class EmailIndex:
+    # El filtro de Bloom responde "seguro que no está registrado" sin tocar
+    # SQLite; el LRU guarda las filas de usuario encontradas hace poco. Un
+    # filtro de Bloom simple no puede olvidar claves, así que las bajas solo
+    # se vuelven falsos positivos y el filtro se reconstruye cuando se
+    # acumulan demasiadas. Las claves van en minúsculas, igual que la columna
+    # email con COLLATE NOCASE.
+    #
+    # Un rechazo del filtro solo vale si nadie escribió en la base desde la
+    # reconstrucción: version es un valor opaco (PRAGMA data_version) que
+    # cambia con cada commit de otra conexión, de este proceso o de otro. Si
+    # cambió, el rechazo se confirma en SQLite; una fila que el filtro no
+    # tenía (la importó otro proceso) se agrega y pide una reconstrucción.
+    # Los add() que llegan durante una reconstrucción se guardan aparte y se
+    # aplican al filtro nuevo antes del cambio.
+    def __init__(self, lru_size=4096, error_rate=0.01, min_capacity=10000, resync_interval=60.0):
+        self.lru = LRUCache(lru_size)
+        self.error_rate = error_rate
+        self.min_capacity = min_capacity
+        self.resync_interval = resync_interval
+        self.bloom = None
+        self.version = None
+        self.loaded_at = 0.0
+        self.deleted = 0
+        self.unverified = 0
+        self.stale = False
+        self.counters = dict.fromkeys(
+            ("bloom_rejects", "bloom_passes", "false_positives", "unverified_rejects", "stale_rejects",
+             "lru_hits", "lru_misses", "rebuilds"), 0
+        )
+        self._pending = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.bloom is not None
+
+    def rebuild(self, scan, force=False):
+        # scan() devuelve (versión, cantidad, emails) y se recorre fuera del
+        # lock. Solo corre una reconstrucción a la vez.
+        with self._lock:
+            if self._pending is not None or not (force or self._needs_rebuild()):
+                return False
+            self._pending = []
+        try:
+            version, count, emails = scan()
+            bloom = BloomFilter(max(self.min_capacity, count * 2), self.error_rate)
+            for email in emails:
+                bloom.add(email.lower())
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            for email in self._pending:
+                bloom.add(email)
+            self.bloom = bloom
+            self.version = version
+            self.loaded_at = time.monotonic()
+            self.deleted = self.unverified = 0
+            self.stale = False
+            self._pending = None
+            self.counters["rebuilds"] += 1
+        return True
+
+    def needs_rebuild(self):
+        with self._lock:
+            return self._pending is None and self._needs_rebuild()
+
+    def _needs_rebuild(self):
+        if self.bloom is None:
+            return False
+        # Tras escrituras de otras conexiones los rechazos se confirman en
+        # SQLite hasta la próxima reconstrucción; como mucho se espera resync_interval
+        resync = self.unverified and time.monotonic() - self.loaded_at > self.resync_interval
+        return (self.bloom.count > self.bloom.capacity or self.deleted > self.bloom.capacity // 10
+                or self.stale or bool(resync))
+
+    def might_contain(self, email):
+        with self._lock:
+            if self.bloom is None or email.lower() in self.bloom:
+                self.counters["bloom_passes"] += 1
+                return True
+            self.counters["bloom_rejects"] += 1
+            return False
+
+    def is_current(self, version):
+        # ¿El filtro refleja todos los commits hasta version?
+        with self._lock:
+            if version == self.version:
+                return True
+            self.unverified += 1
+            self.counters["unverified_rejects"] += 1
+            return False
+
+    def lookup(self, email):
+        with self._lock:
+            row = self.lru.get(email.lower())
+            self.counters["lru_hits" if row is not None else "lru_misses"] += 1
+            return row
+
+    def remember(self, email, row):
+        key = email.lower()
+        with self._lock:
+            if row is None:
+                if self.bloom is None or key in self.bloom:
+                    self.counters["false_positives"] += 1
+                return
+            if self.bloom is not None and key not in self.bloom:
+                # La escribió otra conexión sin pasar por add()
+                self.counters["stale_rejects"] += 1
+                self.stale = True
+                self._add(key)
+            self.lru.put(key, row)
+
+    def add(self, email):
+        with self._lock:
+            self._add(email.lower())
+
+    def _add(self, key):
+        if self.bloom is not None:
+            self.bloom.add(key)
+        if self._pending is not None:
+            self._pending.append(key)
+
+    def discard(self, email):
+        with self._lock:
+            self.lru.pop(email.lower())
+            self.deleted += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["lru_size"] = len(self.lru)
+            if self.bloom is not None:
+                stats.update(bloom_bits=self.bloom.size, bloom_hashes=self.bloom.hashes,
+                             bloom_keys=self.bloom.count, bloom_capacity=self.bloom.capacity)
+            return stats
@@ -0,0 +1,88 @@
+import threading
+
+NOW = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+# Cada migración es (versión, sentencias). Corren en orden, una transacción
+# por versión, y PRAGMA user_version guarda la última aplicada: los auth.db
+# existentes se actualizan en el lugar.
+MIGRATIONS = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            email VARCHAR(255) NOT NULL UNIQUE,
+            password VARCHAR(255) NOT NULL
+        )
+        """,
+    ]),
+    # SQLite no puede cambiar la collation de una columna: se rehace la tabla.
+    # De los duplicados con distinta capitalización que guardaban versiones
+    # anteriores queda la primera fila; las demás pasan a users_duplicates con
+    # el id de la que se conservó, para revisarlas y restaurarlas a mano.
+    (2, [
+        f"""
+        CREATE TABLE users_duplicates (
+            id INTEGER PRIMARY KEY,
+            email VARCHAR(255) NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            kept_id INTEGER NOT NULL,
+            dropped_at INTEGER NOT NULL DEFAULT ({NOW})
+        )
+        """,
+        """
+        INSERT INTO users_duplicates (id, email, password, kept_id)
+        SELECT id, email, password,
+               (SELECT MIN(kept.id) FROM users AS kept WHERE kept.email = users.email COLLATE NOCASE)
+        FROM users
+        WHERE id NOT IN (SELECT MIN(id) FROM users GROUP BY email COLLATE NOCASE)
+        """,
+        f"""
+        CREATE TABLE users_new (
+            id INTEGER PRIMARY KEY,
+            email VARCHAR(255) NOT NULL COLLATE NOCASE,
+            password VARCHAR(255) NOT NULL,
+            created_at INTEGER NOT NULL DEFAULT ({NOW}),
+            last_login INTEGER
+        )
+        """,
+        f"""
+        INSERT INTO users_new (id, email, password, created_at)
+        SELECT id, email, password, {NOW} FROM users
+        WHERE id IN (SELECT MIN(id) FROM users GROUP BY email COLLATE NOCASE)
+        """,
+        "DROP TABLE users",
+        "ALTER TABLE users_new RENAME TO users",
+        "CREATE UNIQUE INDEX users_email ON users (email COLLATE NOCASE)",
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+_lock = threading.Lock()
+_migrated = set()
+
+def migrate(db):
+    version = db.execute("PRAGMA user_version").fetchone()[0]
+    for target, statements in MIGRATIONS:
+        if target <= version:
+            continue
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in statements:
+                db.execute(statement)
+            db.execute(f"PRAGMA user_version = {target}")
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return max(version, SCHEMA_VERSION)
+
+def ensure_schema(path, db):
+    # Cada sesión lo llama al empezar; solo la primera llamada por archivo de
+    # base en este proceso toca el esquema.
+    if path in _migrated:
+        return
+    with _lock:
+        if path not in _migrated:
+            migrate(db)
+            _migrated.add(path)
@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import secrets
+import base64
+import json
+import hmac
+import time
+import os
+
+cost_path = os.path.join(os.path.dirname(__file__), "kdf.json")
+DEFAULT_COST = {"n": 2 ** 14, "r": 8, "p": 1}
+PREFIX = "scrypt"
+
+def _b64encode(data):
+    return base64.b64encode(data).decode("ascii")
+
+def _scrypt(password, salt, n, r, p):
+    # La memoria de trabajo es 128 * r * (n + p + 2) bytes; se deja margen.
+    maxmem = 128 * r * (n + p + 2) + 1024 * 1024
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=32)
+
+def hash_password(password, n, r, p):
+    salt = secrets.token_bytes(16)
+    key = _scrypt(password, salt, n, r, p)
+    return f"{PREFIX}${n}${r}${p}${_b64encode(salt)}${_b64encode(key)}"
+
+def parse_hash(stored):
+    parts = stored.split("$")
+    if len(parts) != 6 or parts[0] != PREFIX:
+        return None
+    n, r, p = (int(value) for value in parts[1:4])
+    return n, r, p, base64.b64decode(parts[4]), base64.b64decode(parts[5])
+
+def verify_password(password, stored):
+    parsed = parse_hash(stored)
+    if parsed is None:
+        # Las filas anteriores al hashing guardan la contraseña en claro.
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    n, r, p, salt, key = parsed
+    return hmac.compare_digest(_scrypt(password, salt, n, r, p), key)
+
+def load_cost(path=cost_path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {**DEFAULT_COST, **json.load(f)}
+    except FileNotFoundError:
+        return dict(DEFAULT_COST)
+
+def save_cost(cost, path=cost_path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cost, f, indent=2)
+
+def time_hash(n, r, p, rounds=3):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        _scrypt("calibration", b"\0" * 16, n, r, p)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def calibrate(target_ms, r=8, p=1, min_n=2 ** 10, max_n=2 ** 22):
+    # n tiene que ser potencia de dos: se elige la mayor que no pase de la
+    # latencia objetivo (o la mínima si incluso esa es demasiado lenta).
+    n = min_n
+    while n * 2 <= max_n and time_hash(n * 2, r, p) * 1000 <= target_ms:
+        n *= 2
+    return {"n": n, "r": r, "p": p}
+
+class PasswordHasher:
+    # hashlib.scrypt libera el GIL: con un pool de hilos chico alcanza para
+    # sacar el KDF de los handlers de Flet y acotar su parte de CPU.
+    def __init__(self, cost=None, max_workers=2):
+        self.cost = cost or load_cost()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kdf")
+
+    def hash(self, password):
+        return self._executor.submit(hash_password, password, self.cost["n"], self.cost["r"], self.cost["p"])
+
+    def verify(self, password, stored):
+        return self._executor.submit(verify_password, password, stored)
+
+    def needs_rehash(self, stored):
+        parsed = parse_hash(stored)
+        return parsed is None or parsed[:3] != (self.cost["n"], self.cost["r"], self.cost["p"])
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
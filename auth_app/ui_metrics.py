@@ -0,0 +1,40 @@
+from dataclasses import asdict
+import logging
+import json
+import time
+
+logger = logging.getLogger("auth_app.metrics")
+
+class UpdateMetrics:
+    # Envuelve send_commands de la conexión de la página: cada diff enviado
+    # al cliente se mide y se atribuye a la última acción marcada.
+    def __init__(self, page, enabled=True):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.time_to_first_paint = None
+        self.label = "startup"
+        self.payloads = {}
+        connection = page.connection if enabled else None
+        if connection is not None:
+            send_commands = connection.send_commands
+
+            def metered_send_commands(session_id, commands):
+                self.record(commands)
+                return send_commands(session_id, commands)
+
+            connection.send_commands = metered_send_commands
+
+    def record(self, commands):
+        size = len(json.dumps([asdict(command) for command in commands], default=str))
+        count, total = self.payloads.get(self.label, (0, 0))
+        self.payloads[self.label] = (count + 1, total + size)
+        logger.info("%s: %d command(s), %d bytes", self.label, len(commands), size)
+
+    def mark(self, label):
+        if self.enabled:
+            self.label = label
+
+    def first_paint(self):
+        if self.enabled:
+            self.time_to_first_paint = time.perf_counter() - self.started
+            logger.info("time to first paint: %.1f ms", self.time_to_first_paint * 1000)
@@ -0,0 +1,89 @@
+from auth_app import Database
+from passwords import PasswordHasher, parse_hash
+from collections import deque
+import argparse
+import time
+import csv
+import sys
+import os
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield row["email"].strip(), row["password"]
+
+def hash_rows(rows, hasher, in_flight):
+    # Como mucho in_flight hashes pendientes: cada fila que sale deja lugar a
+    # la siguiente, así el KDF sigue trabajando mientras se inserta el bloque
+    # anterior. Las filas que ya traen un hash scrypt se importan tal cual.
+    pending = deque()
+    for email, password in rows:
+        pending.append((email, hasher.hash(password) if parse_hash(password) is None else password))
+        if len(pending) >= in_flight:
+            yield resolve(*pending.popleft())
+    while pending:
+        yield resolve(*pending.popleft())
+
+def resolve(email, password):
+    return email, password if isinstance(password, str) else password.result()
+
+def import_csv(path, chunk_size=5000, duplicates_out=None, workers=None):
+    # Un hasher propio con un hilo por CPU: el de la app tiene 2 hilos
+    # pensados para los logins de la interfaz
+    hasher = PasswordHasher(max_workers=workers or os.cpu_count() or 1)
+    on_duplicate = None
+    if duplicates_out is not None:
+        on_duplicate = lambda email: duplicates_out.write(email + "\n")
+    try:
+        rows = hash_rows(read_csv(path), hasher, chunk_size)
+        return Database.import_users(rows, chunk_size, on_duplicate)
+    finally:
+        hasher.shutdown()
+
+def export_csv(out, batch_size=1000):
+    writer = csv.writer(out)
+    writer.writerow(["email", "password"])
+    count = 0
+    for row in Database.iter_users(batch_size):
+        writer.writerow(row)
+        count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import/export of auth_app users as CSV")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="stream users from a CSV with email,password columns")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--chunk-size", type=int, default=5000, help="rows per transaction and hashes in flight")
+    import_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="threads hashing passwords")
+    import_parser.add_argument("--duplicates", help="write rejected duplicate emails to this file")
+
+    export_parser = commands.add_parser("export", help="stream all users as CSV")
+    export_parser.add_argument("path", nargs="?", help="output file (defaults to stdout)")
+    export_parser.add_argument("--batch-size", type=int, default=1000)
+
+    args = parser.parse_args()
+    Database.connect_to_database()
+    start = time.perf_counter()
+
+    if args.command == "import":
+        duplicates_out = open(args.duplicates, "w", encoding="utf-8") if args.duplicates else None
+        try:
+            inserted, duplicates = import_csv(args.path, args.chunk_size, duplicates_out, args.workers)
+        finally:
+            if duplicates_out:
+                duplicates_out.close()
+        elapsed = time.perf_counter() - start
+        print(f"Imported {inserted} user(s), skipped {duplicates} duplicate(s) in {elapsed:.2f}s", file=sys.stderr)
+    else:
+        if args.path:
+            with open(args.path, "w", newline="", encoding="utf-8") as out:
+                count = export_csv(out, args.batch_size)
+        else:
+            count = export_csv(sys.stdout, args.batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"Exported {count} user(s) in {elapsed:.2f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
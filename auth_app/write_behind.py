@@ -0,0 +1,102 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import queue
+import time
+
+# Durabilidad de una escritura cuyo future terminó bien:
+#   "full"   - synchronous=FULL: el commit agrupado pasó por fsync antes de
+#              resolver los futures, así que sobrevive a un corte de luz.
+#   "normal" - synchronous=NORMAL (WAL): sobrevive a una caída de la
+#              aplicación; con un corte de luz los últimos commits agrupados
+#              pueden deshacerse.
+#   "off"    - synchronous=OFF: sobrevive a una caída de la aplicación solo si
+#              el sistema vacía sus buffers; el más rápido, para datos descartables.
+# En todos los modos una escritura que sigue en la cola cuando muere el
+# proceso se pierde y su future nunca se resuelve: nadie la informa como guardada.
+SYNCHRONOUS = {"full": "FULL", "normal": "NORMAL", "off": "OFF"}
+
+class WriteBehindQueue:
+    def __init__(self, pool, durability="normal", max_batch=256, max_delay=0.005, max_pending=10000,
+                 callback_workers=4):
+        if durability not in SYNCHRONOUS:
+            raise ValueError(f"Unknown durability mode: {durability}")
+        self.pool = pool
+        self.durability = durability
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.commits = 0
+        self.writes = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        # Los futures se resuelven en estos hilos: los callbacks (mensajes a
+        # la sesión, reconstrucción del índice de emails) no frenan el commit
+        # siguiente
+        self._callbacks = ThreadPoolExecutor(max_workers=callback_workers, thread_name_prefix="auth-db-callback")
+        self._thread = threading.Thread(target=self._run, name="auth-db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, params):
+        # Nunca bloquea: se llama desde el event loop del modo async. Con la
+        # cola llena la escritura falla enseguida en lugar de esperar lugar.
+        future = Future()
+        try:
+            self._queue.put_nowait((sql, params, future))
+        except queue.Full:
+            future.set_exception(queue.Full("write-behind queue is full"))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._callbacks.shutdown(wait=True)
+
+    def _run(self):
+        db = self.pool.connection()
+        db.execute(f"PRAGMA synchronous={SYNCHRONOUS[self.durability]}")
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            self._commit(db, batch)
+
+    def _commit(self, db, batch):
+        # Cada escritura tiene su savepoint: si viola una restricción solo
+        # falla el future de quien la pidió, no el grupo entero.
+        results = []
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            for sql, params, _ in batch:
+                db.execute("SAVEPOINT write")
+                try:
+                    results.append((db.execute(sql, params).rowcount, None))
+                except Exception as ex:
+                    db.execute("ROLLBACK TO write")
+                    results.append((None, ex))
+                db.execute("RELEASE write")
+            db.commit()
+        except Exception as ex:
+            if db.in_transaction:
+                db.rollback()
+            results = [(None, ex)] * len(batch)
+
+        self.commits += 1
+        self.writes += len(batch)
+        for (_, _, future), (rowcount, error) in zip(batch, results):
+            if error is None:
+                self._callbacks.submit(future.set_result, rowcount)
+            else:
+                self._callbacks.submit(future.set_exception, error)
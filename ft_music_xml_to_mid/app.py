@@ -1,15 +1,22 @@
-from music21 import converter
-from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, CancelledError, wait
+from collections import Counter
+from conversion import ConversionPool, default_workers
 import flet as ft
-import tempfile
-import zipfile
 import os
 
+# Un solo pool de procesos calientes para todas las sesiones de la app; cada
+# sesión decide cuántos de esos procesos ocupa a la vez
+conversion_pool = ConversionPool(int(os.environ.get("MUSIC_CONVERTER_WORKERS", 0)) or default_workers())
+
 class MusicConverterApp:
     def __init__(self, page: ft.Page):
         self.page = page
         self.uploaded_files = []
         self.converted_files = {}
+        self.file_status = {}
+        self.in_flight = {}
+        self.cancelled = False
+        self.workers = conversion_pool.workers
         
         self.setup_page()
         self.setup_ui()
@@ -21,6 +28,7 @@ class MusicConverterApp:
         self.page.horizontal_alignment = ft.CrossAxisAlignment.CENTER
         self.page.bgcolor = ft.colors.BLACK54
         self.page.padding = 20
+        self.page.on_disconnect = lambda e: self.cancel_pending()
 
     def setup_ui(self):
         self.file_picker = ft.FilePicker(on_result=self.handle_file_pick)
@@ -48,6 +56,23 @@ class MusicConverterApp:
             color=ft.colors.WHITE,
             disabled=True
         )
+
+        self.cancel_button = ft.ElevatedButton(
+            "Cancel",
+            icon=ft.icons.CANCEL,
+            on_click=self.cancel_conversion,
+            bgcolor=ft.colors.RED_400,
+            color=ft.colors.WHITE,
+            visible=False
+        )
+
+        self.workers_dropdown = ft.Dropdown(
+            label="Workers",
+            width=110,
+            value=str(self.workers),
+            options=[ft.dropdown.Option(str(n)) for n in range(1, conversion_pool.workers + 1)],
+            on_change=self.change_workers
+        )
         
         self.result_text = ft.Text(value="", size=16, color=ft.colors.BLACK)
         self.download_container = ft.Column(
@@ -71,7 +96,10 @@ class MusicConverterApp:
                         border_radius=5,
                         bgcolor=ft.colors.WHITE
                     ),
-                    self.convert_button,
+                    ft.Row(
+                        controls=[self.workers_dropdown, self.convert_button, self.cancel_button],
+                        alignment=ft.MainAxisAlignment.CENTER
+                    ),
                     self.result_text,
                     self.download_container
                 ],
@@ -98,61 +126,111 @@ class MusicConverterApp:
 
     def update_file_list(self):
         self.file_list.controls.clear()
+        self.file_status.clear()
         for file_path in self.uploaded_files:
             file_name = os.path.basename(file_path)
-            self.file_list.controls.append(ft.Text(file_name, color=ft.colors.BLACK))
+            status = ft.Text("", size=12, color=ft.colors.GREY_600)
+            self.file_status[file_path] = status
+            self.file_list.controls.append(ft.Row(
+                controls=[ft.Text(file_name, color=ft.colors.BLACK, expand=True), status]
+            ))
         self.page.update()
 
-    def extract_mxl(self, mxl_path: str) -> str:
-        try:
-            with zipfile.ZipFile(mxl_path, 'r') as zip_ref:
-                xml_files = [f for f in zip_ref.namelist() if f.endswith('.xml') and 'META-INF' not in f]
-                if not xml_files:
-                    raise ValueError("No XML file found in .mxl archive")
-                
-                temp_dir = tempfile.mkdtemp()
-                xml_file = xml_files[0]
-                extracted_path = os.path.join(temp_dir, xml_file)
-                zip_ref.extract(xml_file, temp_dir)
-                return extracted_path
-        except Exception as e:
-            raise RuntimeError(f"Error extracting {os.path.basename(mxl_path)}: {str(e)}")
+    def set_status(self, file_path, text, color):
+        self.file_status[file_path].value = text
+        self.file_status[file_path].color = color
+
+    def change_workers(self, e):
+        self.workers = int(self.workers_dropdown.value)
+
+    def set_running(self, running):
+        self.convert_button.disabled = running
+        self.upload_button.disabled = running
+        self.workers_dropdown.disabled = running
+        self.cancel_button.visible = running
 
     def convert_files(self, e):
         self.converted_files.clear()
         self.download_container.controls.clear()
+        for file_path in self.uploaded_files:
+            self.set_status(file_path, "Queued", ft.colors.GREY_600)
+        self.set_running(True)
+        self.cancelled = False
+        self.result_text.value = f"Converting {len(self.uploaded_files)} file(s) with {self.workers} worker(s)..."
         self.page.update()
 
-        for file_path in self.uploaded_files:
-            try:
-                if file_path.lower().endswith('.mxl'):
-                    xml_path = self.extract_mxl(file_path)
+        # Los archivos se convierten en los procesos del pool; el handler
+        # vuelve enseguida y los resultados se recogen en otro hilo
+        self.page.run_thread(self.collect_results, list(self.uploaded_files))
+
+    def collect_results(self, paths):
+        # Como mucho self.workers archivos de esta sesión en el pool a la vez:
+        # el siguiente se envía cuando termina uno
+        done = failed = cancelled = 0
+        io_counters = Counter()
+        queue = iter(paths)
+        while True:
+            while not self.cancelled and len(self.in_flight) < self.workers:
+                file_path = next(queue, None)
+                if file_path is None:
+                    break
+                self.in_flight[conversion_pool.submit(file_path)] = file_path
+            if not self.in_flight:
+                break
+            finished, _ = wait(list(self.in_flight), return_when=FIRST_COMPLETED)
+            for future in finished:
+                file_path = self.in_flight.pop(future)
+                try:
+                    output_path, seconds, counters = future.result()
+                except CancelledError:
+                    cancelled += 1
+                    self.set_status(file_path, "Cancelled", ft.colors.GREY_600)
+                except Exception as ex:
+                    failed += 1
+                    self.set_status(file_path, f"Error: {ex}", ft.colors.RED_600)
                 else:
-                    xml_path = file_path
-
-                score = converter.parse(xml_path)
-                output_name = f"{Path(file_path).stem}.mid"
-                output_path = os.path.join(os.path.dirname(file_path), output_name)
-                score.write("midi", output_path)
-                self.converted_files[output_name] = output_path
-
-                if file_path.lower().endswith('.mxl'):
-                    temp_dir = os.path.dirname(xml_path)
-                    for root, dirs, files in os.walk(temp_dir, topdown=False):
-                        for name in files:
-                            os.remove(os.path.join(root, name))
-                        for name in dirs:
-                            os.rmdir(os.path.join(root, name))
-                    os.rmdir(temp_dir)
-
-            except Exception as ex:
-                self.result_text.value = f"Error converting {os.path.basename(file_path)}: {str(ex)}"
-                self.page.update()
-                return
+                    done += 1
+                    io_counters.update(counters)
+                    self.converted_files[os.path.basename(output_path)] = output_path
+                    self.set_status(file_path, f"Done in {seconds:.2f}s", ft.colors.GREEN_600)
+                self.result_text.value = f"{done + failed + cancelled}/{len(paths)} processed, {failed} failed"
+                # Solo el estado del archivo y el progreso, no toda la página
+                self.page.update(self.file_status[file_path], self.result_text)
 
+        for file_path in queue:
+            cancelled += 1
+            self.set_status(file_path, "Cancelled", ft.colors.GREY_600)
+
+        summary = f"Converted {done} of {len(paths)} file(s)"
+        if failed:
+            summary += f", {failed} failed"
+        if cancelled:
+            summary += f", {cancelled} cancelled"
+        lookups = io_counters["cache_hits"] + io_counters["cache_misses"]
+        if lookups:
+            summary += (f"\nCache: {io_counters['cache_hits']}/{lookups} hits "
+                        f"({io_counters['cache_hits'] / lookups:.0%})")
+        if done:
+            summary += (f"\nRead {io_counters['bytes_read'] / 1024:.0f} KB "
+                        f"({io_counters['bytes_inflated'] / 1024:.0f} KB unzipped in memory), "
+                        f"wrote {io_counters['bytes_written'] / 1024:.0f} KB")
+        self.result_text.value = summary
+        self.set_running(False)
         self.add_go_to_buttons()
         self.page.update()
 
+    def cancel_pending(self):
+        # No se envían más archivos y se cancelan los que aún esperan en el
+        # pool; los que ya están en un proceso terminan y se informan normalmente
+        self.cancelled = True
+        for future in self.in_flight.copy():
+            future.cancel()
+
+    def cancel_conversion(self, e):
+        self.cancel_pending()
+        self.cancel_button.visible = False
+        self.cancel_button.update()
+
     def add_go_to_buttons(self):
         for file_name, file_path in self.converted_files.items():
             # Botón para ir a la ruta del archivo convertido
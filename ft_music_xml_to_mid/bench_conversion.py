@@ -0,0 +1,76 @@
+from concurrent.futures import as_completed
+from conversion import ConversionPool, convert_file, warm_worker
+from collections import Counter
+import argparse
+import tempfile
+import time
+import os
+
+def make_scores(directory, count, notes=64, fmt="musicxml"):
+    from music21 import stream, note
+    paths = []
+    extension = "mxl" if fmt == "mxl" else "xml"
+    for i in range(count):
+        score, part = stream.Score(), stream.Part()
+        for j in range(notes):
+            part.append(note.Note(60 + (i + j) % 24, quarterLength=0.5))
+        score.append(part)
+        paths.append(score.write(fmt, os.path.join(directory, f"score{i:04d}.{extension}")))
+    return [str(path) for path in paths]
+
+def temp_entries():
+    # Lo que haya en los directorios temporales, incluido el de music21
+    from music21 import environment
+    directories = {tempfile.gettempdir(), str(environment.Environment().getRootTempDir())}
+    return {os.path.join(d, name) for d in directories for name in os.listdir(d)}
+
+def run_serial(paths, cache_dir=None):
+    warm_worker()
+    counters = Counter()
+    before = temp_entries()
+    start = time.perf_counter()
+    for path in paths:
+        counters.update(convert_file(path, cache_dir)[2])
+    elapsed = time.perf_counter() - start
+    return elapsed, counters, len(temp_entries() - before)
+
+def run_pool(paths, workers):
+    pool = ConversionPool(workers, cache_dir=None)
+    # El arranque del pool se mide aparte: en la app ocurre una sola vez
+    start = time.perf_counter()
+    for future in as_completed(pool.submit_all(paths[:workers])):
+        future.result()
+    startup = time.perf_counter() - start
+    start = time.perf_counter()
+    for future in as_completed(pool.submit_all(paths)):
+        future.result()
+    elapsed = time.perf_counter() - start
+    pool.shutdown(wait=True)
+    return startup, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Time batch MusicXML to MIDI conversion")
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--format", choices=["musicxml", "mxl"], default="musicxml")
+    parser.add_argument("--cache", action="store_true", help="also time a cold and a warm pass through a fresh MIDI cache")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_scores(directory, args.files, fmt=args.format)
+        serial, counters, leftovers = run_serial(paths)
+        print(f"serial, in process: {serial:.2f}s ({args.files / serial:.1f} files/s)")
+        print(f"  read {counters['bytes_read']:,} B, unzipped {counters['bytes_inflated']:,} B in memory, "
+              f"wrote {counters['bytes_written']:,} B, {leftovers} new temp file(s)")
+        if args.cache:
+            cache_dir = os.path.join(directory, "cache")
+            for label in ("cold", "warm"):
+                elapsed, counters, _ = run_serial(paths, cache_dir)
+                print(f"serial, {label} cache: {elapsed:.2f}s ({args.files / elapsed:.1f} files/s, "
+                      f"{counters['cache_hits']}/{args.files} hits)")
+        for workers in args.workers:
+            startup, elapsed = run_pool(paths, workers)
+            print(f"pool, {workers} worker(s): {elapsed:.2f}s ({args.files / elapsed:.1f} files/s, "
+                  f"x{serial / elapsed:.2f}), pool start {startup:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree import ElementTree as ET
+from collections import Counter
+from midi_cache import DEFAULT_DIR as DEFAULT_CACHE_DIR, MidiCache, cache_key
+from pathlib import Path
+import multiprocessing
+import threading
+import zipfile
+import sqlite3
+import io
+import time
+import os
+
+MUSICXML_MEDIA_TYPE = "application/vnd.recordare.musicxml+xml"
+
+# Opciones de score.write("midi"); forman parte de la clave de la caché
+MIDI_OPTIONS = {"addStartDelay": False, "addEndDelay": True}
+
+caches = {}
+
+WARM_UP_SCORE = """<?xml version="1.0" encoding="UTF-8"?>
+<score-partwise version="3.1">
+  <part-list><score-part id="P1"><part-name>Warm up</part-name></score-part></part-list>
+  <part id="P1"><measure number="1">
+    <attributes><divisions>1</divisions></attributes>
+    <note><pitch><step>C</step><octave>4</octave></pitch><duration>4</duration><type>whole</type></note>
+  </measure></part>
+</score-partwise>
+"""
+
+def warm_worker():
+    # Corre una vez por proceso del pool: importar music21 y pasar una
+    # partitura mínima por el parser y el escritor MIDI cuesta casi un
+    # segundo, y así no lo paga el primer archivo de cada proceso.
+    global xmlToM21
+    from music21.musicxml import xmlToM21
+    parse_score(WARM_UP_SCORE.encode(), "warm_up.xml").write("midi", os.devnull)
+
+def mxl_rootfile(archive):
+    # La partitura principal es el primer rootfile de META-INF/container.xml
+    # (el resto pueden ser PDFs, imágenes u otras versiones)
+    try:
+        container = ET.fromstring(archive.read("META-INF/container.xml"))
+    except KeyError:
+        raise ValueError("META-INF/container.xml not found in .mxl archive")
+    for rootfile in container.iter():
+        if rootfile.tag.rsplit("}", 1)[-1] != "rootfile":
+            continue
+        if rootfile.get("media-type", MUSICXML_MEDIA_TYPE) == MUSICXML_MEDIA_TYPE:
+            return rootfile.get("full-path")
+    raise ValueError("No MusicXML rootfile listed in META-INF/container.xml")
+
+def read_mxl(data, file_path, counters):
+    # Las .mxl se descomprimen directo a bytes: no hay carpetas temporales
+    # que limpiar si algo falla
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            score = archive.read(mxl_rootfile(archive))
+    except Exception as e:
+        raise RuntimeError(f"Error reading {os.path.basename(file_path)}: {str(e)}")
+    counters["bytes_inflated"] += len(score)
+    return score
+
+def parse_score(data, file_path):
+    # Lo mismo que converter.parse pero desde bytes en memoria. El parser XML
+    # recibe los bytes tal cual y respeta el encoding de la declaración
+    # (ISO-8859-1, UTF-16...); converter.parseData los decodificaría como UTF-8.
+    importer = xmlToM21.MusicXMLImporter()
+    importer.readFile(io.BytesIO(data))
+    if importer.stream.metadata.movementName is None:
+        importer.stream.metadata.movementName = os.path.basename(file_path)
+    return importer.stream
+
+def output_path_for(file_path):
+    return os.path.join(os.path.dirname(file_path), f"{Path(file_path).stem}.mid")
+
+def open_cache(cache_dir):
+    # Una conexión al índice por proceso y directorio. Si la caché no se
+    # puede abrir se convierte igual, sin ella.
+    if cache_dir not in caches:
+        try:
+            caches[cache_dir] = MidiCache(cache_dir)
+        except (OSError, sqlite3.Error):
+            caches[cache_dir] = None
+    return caches[cache_dir]
+
+def cache_get(cache, key, output_path):
+    # Un índice bloqueado o dañado cuenta como fallo de caché: se convierte igual
+    try:
+        return cache.get(key, output_path)
+    except (OSError, sqlite3.Error):
+        return False
+
+def convert_file(file_path, cache_dir=DEFAULT_CACHE_DIR):
+    # Unidad de trabajo del pool: devuelve (ruta del .mid, segundos, contadores de E/S)
+    if "xmlToM21" not in globals():
+        warm_worker()
+    start = time.perf_counter()
+    counters = Counter()
+    with open(file_path, "rb") as f:
+        data = f.read()
+    counters["bytes_read"] += len(data)
+    output_path = output_path_for(file_path)
+
+    cache = open_cache(cache_dir) if cache_dir else None
+    key = cache_key(data, MIDI_OPTIONS) if cache else None
+    if cache and cache_get(cache, key, output_path):
+        counters["cache_hits"] += 1
+    else:
+        if file_path.lower().endswith('.mxl'):
+            data = read_mxl(data, file_path, counters)
+        # Sin converter.parse: guarda además una copia en pickle de cada
+        # partitura en el directorio temporal de music21
+        score = parse_score(data, file_path)
+        score.write("midi", output_path, **MIDI_OPTIONS)
+        if cache:
+            counters["cache_misses"] += 1
+            try:
+                cache.put(key, output_path)
+            except (OSError, sqlite3.Error):
+                pass
+    counters["bytes_written"] += os.path.getsize(output_path)
+    return output_path, time.perf_counter() - start, counters
+
+def default_workers():
+    return os.cpu_count() or 1
+
+class ConversionPool:
+    # Procesos que sobreviven entre conversiones: music21 se importa y se
+    # calienta una sola vez por proceso.
+    def __init__(self, workers=None, cache_dir=DEFAULT_CACHE_DIR):
+        self.workers = workers or default_workers()
+        self.cache_dir = cache_dir
+        self._executor = None
+        # Varias sesiones de la app envían archivos desde sus propios hilos
+        self._lock = threading.RLock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is not None:
+                return self._executor
+            # spawn: la app ya tiene hilos corriendo y no es seguro hacer fork
+            self._executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=warm_worker
+            )
+            return self._executor
+
+    def submit(self, path):
+        with self._lock:
+            try:
+                return self.executor.submit(convert_file, path, self.cache_dir)
+            except BrokenProcessPool:
+                # Un proceso murió en una corrida anterior: se arranca un pool nuevo
+                self.shutdown()
+                return self.executor.submit(convert_file, path, self.cache_dir)
+
+    def submit_all(self, paths):
+        return {self.submit(path): path for path in paths}
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,143 @@
+from concurrent.futures import FIRST_COMPLETED, wait
+from conversion import ConversionPool, convert_file, output_path_for
+from midi_cache import DEFAULT_DIR as DEFAULT_CACHE_DIR
+from datetime import datetime, timezone
+import argparse
+import json
+import time
+import sys
+import os
+
+EXTENSIONS = (".xml", ".musicxml", ".mxl")
+
+def find_sources(root):
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            if name.lower().endswith(EXTENSIONS):
+                yield os.path.join(directory, name)
+
+def is_up_to_date(source, output):
+    # Como make: solo se rehace si la partitura es más nueva que su .mid
+    try:
+        return os.path.getmtime(output) >= os.path.getmtime(source)
+    except FileNotFoundError:
+        return False
+
+def plan(root, force=False):
+    # Reparte las partituras entre pendientes y ya convertidas. Dos fuentes
+    # con el mismo nombre en la misma carpeta (a.xml y a.mxl) escribirían el
+    # mismo .mid: la segunda se informa como error en lugar de pisar a la primera.
+    pending, entries, outputs = [], [], {}
+    for source in find_sources(root):
+        output = output_path_for(source)
+        entry = {"source": source, "output": output, "status": "pending", "seconds": None, "error": None}
+        entries.append(entry)
+        if output in outputs:
+            entry.update(status="failed", error=f"same output as {outputs[output]}")
+            continue
+        outputs[output] = source
+        if not force and is_up_to_date(source, output):
+            entry["status"] = "skipped"
+        else:
+            pending.append(entry)
+    return entries, pending
+
+def run_in_process(pending, cache_dir):
+    for entry in pending:
+        try:
+            yield entry, convert_file(entry["source"], cache_dir), None
+        except Exception as error:
+            yield entry, None, error
+
+def run_in_pool(pending, workers, cache_dir):
+    # Como mucho 2 archivos por proceso en vuelo
+    pool = ConversionPool(workers, cache_dir)
+    queue = iter(pending)
+    in_flight = {}
+    try:
+        while True:
+            while len(in_flight) < workers * 2:
+                entry = next(queue, None)
+                if entry is None:
+                    break
+                in_flight[pool.submit(entry["source"])] = entry
+            if not in_flight:
+                return
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                entry = in_flight.pop(future)
+                try:
+                    yield entry, future.result(), None
+                except Exception as error:
+                    yield entry, None, error
+    finally:
+        pool.shutdown(wait=True)
+
+def convert_tree(root, workers=1, force=False, cache_dir=DEFAULT_CACHE_DIR, progress=None):
+    # Modo biblioteca: devuelve el informe sin tocar stdout. Un error en una
+    # partitura queda en su entrada y se sigue con las demás.
+    started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    start = time.perf_counter()
+    entries, pending = plan(root, force)
+    if progress:
+        for entry in entries:
+            if entry["status"] == "failed":
+                progress(entry)
+    if workers <= 1:
+        results = run_in_process(pending, cache_dir)
+    else:
+        results = run_in_pool(pending, workers, cache_dir)
+    for entry, result, error in results:
+        if error is None:
+            _, seconds, counters = result
+            entry.update(status="converted", seconds=round(seconds, 4), cache_hit=bool(counters["cache_hits"]))
+        else:
+            entry.update(status="failed", error=f"{type(error).__name__}: {error}")
+        if progress:
+            progress(entry)
+
+    summary = {status: 0 for status in ("converted", "skipped", "failed")}
+    for entry in entries:
+        summary[entry["status"]] += 1
+    summary["cache_hits"] = sum(entry.get("cache_hit", False) for entry in entries)
+    return {
+        "root": os.path.abspath(root),
+        "started_at": started_at,
+        "elapsed": round(time.perf_counter() - start, 3),
+        "workers": workers,
+        "summary": summary,
+        "files": entries,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert every MusicXML/MXL file under a directory to MIDI")
+    parser.add_argument("root")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes converting in parallel")
+    parser.add_argument("--force", action="store_true", help="convert even when the .mid is newer than its source")
+    parser.add_argument("--report", "-o", help="JSON report file (defaults to stdout)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="MIDI cache directory")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+    if not os.path.isdir(args.root):
+        parser.error(f"{args.root} is not a directory")
+
+    def progress(entry):
+        print(f"{entry['status']:>9}  {entry['source']}" + (f"  ({entry['error']})" if entry["error"] else ""),
+              file=sys.stderr)
+
+    report = convert_tree(args.root, args.workers, args.force, None if args.no_cache else args.cache_dir, progress)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as out:
+            json.dump(report, out, indent=2, ensure_ascii=False)
+    else:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write("\n")
+    summary = report["summary"]
+    print(f"{summary['converted']} converted ({summary['cache_hits']} from cache), {summary['skipped']} up to date, "
+          f"{summary['failed']} failed in {report['elapsed']:.2f}s with {args.workers} worker(s)", file=sys.stderr)
+    # Código de salida distinto de 0 para que el pipeline note los fallos
+    sys.exit(1 if summary["failed"] else 0)
+
+if __name__ == "__main__":
+    main()
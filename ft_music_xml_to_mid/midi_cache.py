@@ -0,0 +1,99 @@
+import hashlib
+import sqlite3
+import shutil
+import json
+import time
+import os
+
+DEFAULT_DIR = os.environ.get(
+    "MIDI_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "midi_cache")
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("MIDI_CACHE_MAX_BYTES", 256 << 20))
+
+# Subir cuando cambie cómo se genera el MIDI a partir de la partitura
+CONVERTER_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used);
+"""
+
+def cache_key(data, options):
+    # La misma partitura con otra versión de music21 o con otras opciones
+    # de escritura da otro MIDI, así que todo eso entra en la clave
+    import music21
+    header = json.dumps([CONVERTER_VERSION, music21.__version__, options], sort_keys=True)
+    return hashlib.sha256(header.encode() + b"\0" + data).hexdigest()
+
+class MidiCache:
+    # Los MIDI se guardan en objects/<2 primeros>/<clave>.mid y el índice
+    # (tamaño y último uso de cada uno) en index.db. Varios procesos del pool
+    # lo comparten: SQLite serializa las escrituras del índice y los
+    # archivos se publican con os.replace, así que nadie lee uno a medias.
+    # Al pasar de max_bytes se borran los menos usados recientemente.
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(directory, "index.db"), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, "objects", key[:2], f"{key}.mid")
+
+    def get(self, key, output_path):
+        if self.db.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is None:
+            return False
+        try:
+            shutil.copyfile(self.path_for(key), output_path)
+        except FileNotFoundError:
+            # Otro proceso lo desalojó entre la consulta y la copia
+            with self.db:
+                self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            return False
+        with self.db:
+            self.db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return True
+
+    def put(self, key, midi_path):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.copyfile(midi_path, temp_path)
+        os.replace(temp_path, path)
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries (key, size, last_used) VALUES (?, ?, ?)",
+                (key, os.path.getsize(path), time.time()),
+            )
+            self.evict()
+
+    def evict(self):
+        # Se conservan los más recientes mientras quepan en max_bytes
+        stale = self.db.execute(
+            """SELECT key FROM (
+                   SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS kept
+                   FROM entries
+               ) WHERE kept > ?""",
+            (self.max_bytes,),
+        ).fetchall()
+        for (key,) in stale:
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            try:
+                os.remove(self.path_for(key))
+            except FileNotFoundError:
+                pass
+        return len(stale)
+
+    def stats(self):
+        count, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": count, "bytes": size, "max_bytes": self.max_bytes}
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,115 @@
+from concurrent.futures import ProcessPoolExecutor
+from policy import AMBIGUOUS, DEFAULT_POLICY, EntropyPool, PasswordPolicy, compile_policy
+from collections import deque
+from dataclasses import replace
+import argparse
+import hashlib
+import time
+import sys
+
+entropy = EntropyPool()
+
+def generate_chunk(policy, count):
+    # Corre en los procesos del pool: cada proceso tiene su propio
+    # EntropyPool y su propia caché de políticas compiladas
+    compiled = compile_policy(policy)
+    return [compiled.generate(entropy.randbelow) for _ in range(count)]
+
+def chunk_sizes(count, chunk_size):
+    for start in range(0, count, chunk_size):
+        yield min(chunk_size, count - start)
+
+def generate_chunks(policy, count, chunk_size=10000, workers=1):
+    # Como mucho 2 lotes por proceso en vuelo: la memoria no crece con count
+    if workers <= 1:
+        for size in chunk_sizes(count, chunk_size):
+            yield generate_chunk(policy, size)
+        return
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        for size in chunk_sizes(count, chunk_size):
+            pending.append(executor.submit(generate_chunk, policy, size))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def unique_chunks(chunks, policy):
+    # Se recuerdan huellas de 8 bytes en lugar de las contraseñas. Una
+    # colisión de huellas solo descarta una contraseña buena, que se repone.
+    seen = set()
+
+    def keep_new(passwords, fresh):
+        for password in passwords:
+            key = hashlib.blake2b(password.encode(), digest_size=8).digest()
+            if key not in seen:
+                seen.add(key)
+                fresh.append(password)
+
+    for chunk in chunks:
+        fresh = []
+        keep_new(chunk, fresh)
+        while len(fresh) < len(chunk):
+            keep_new(generate_chunk(policy, len(chunk) - len(fresh)), fresh)
+        yield fresh
+
+def write_passwords(out, policy, count, chunk_size=10000, workers=1, dedupe=False):
+    total = compile_policy(policy).total
+    if dedupe and count > total:
+        # Nunca terminaría de reponer las repetidas
+        raise ValueError(f"the policy only allows {total} distinct passwords")
+    chunks = generate_chunks(policy, count, chunk_size, workers)
+    if dedupe:
+        chunks = unique_chunks(chunks, policy)
+    written = 0
+    for chunk in chunks:
+        out.write("\n".join(chunk) + "\n")
+        written += len(chunk)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate passwords in bulk with the app's policy")
+    parser.add_argument("count", type=int)
+    parser.add_argument("--policy", help="JSON file with PasswordPolicy fields; the flags below override it")
+    parser.add_argument("--length", type=int)
+    parser.add_argument("--min-lower", type=int)
+    parser.add_argument("--min-upper", type=int)
+    parser.add_argument("--min-digits", type=int)
+    parser.add_argument("--min-symbols", type=int)
+    parser.add_argument("--symbols", help="symbol alphabet to use instead of the default one")
+    parser.add_argument("--exclude", help="characters never to use")
+    parser.add_argument("--exclude-ambiguous", action="store_true", help=f"also exclude {AMBIGUOUS}")
+    parser.add_argument("--output", "-o", help="output file (defaults to stdout)")
+    parser.add_argument("--workers", type=int, default=1, help="processes generating in parallel")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--dedupe", action="store_true", help="never emit the same password twice")
+    args = parser.parse_args()
+    policy = PasswordPolicy.load(args.policy) if args.policy else DEFAULT_POLICY
+    overrides = {
+        field: getattr(args, field)
+        for field in ("length", "min_lower", "min_upper", "min_digits", "min_symbols", "symbols", "exclude")
+        if getattr(args, field) is not None
+    }
+    if args.exclude_ambiguous:
+        overrides["exclude"] = overrides.get("exclude", policy.exclude) + AMBIGUOUS
+    try:
+        policy = replace(policy, **overrides)
+        compiled = compile_policy(policy)
+    except (TypeError, ValueError) as error:
+        parser.error(str(error))
+    if args.dedupe and args.count > compiled.total:
+        parser.error(f"--dedupe needs count <= {compiled.total}, the number of distinct passwords this policy allows")
+
+    start = time.perf_counter()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            written = write_passwords(out, policy, args.count, args.chunk_size, args.workers, args.dedupe)
+    else:
+        written = write_passwords(sys.stdout, policy, args.count, args.chunk_size, args.workers, args.dedupe)
+    elapsed = time.perf_counter() - start
+    print(f"Generated {written} password(s) of length {policy.length} "
+          f"({compiled.entropy_bits:.1f} bits each) in {elapsed:.2f}s "
+          f"({written / max(elapsed, 1e-9):,.0f}/s, {args.workers} worker(s))", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
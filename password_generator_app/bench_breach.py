@@ -0,0 +1,62 @@
+from breach import BreachIndex, build_index
+import argparse
+import tempfile
+import resource
+import hashlib
+import random
+import time
+import os
+
+def write_hash_list(path, count, rng):
+    # Lista sintética al estilo HIBP, sin ordenar para ejercitar la
+    # ordenación externa
+    with open(path, "w") as f:
+        for _ in range(count):
+            f.write(f"{rng.getrandbits(160):040X}:{rng.randint(1, 1000)}\n")
+
+def percentiles(latencies):
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+    return f"p50={pick(0.5):.1f}µs p99={pick(0.99):.1f}µs max={latencies[-1]:.1f}µs"
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and lookup latency of the breached-password index")
+    parser.add_argument("--hashes", type=int, default=2_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--index", help="benchmark an existing index instead of a synthetic one")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.index
+        if path is None:
+            source = os.path.join(directory, "hashes.txt")
+            write_hash_list(source, args.hashes, rng)
+            path = os.path.join(directory, "breached.idx")
+            start = time.perf_counter()
+            build_index([source], path, run_size=max(1, args.hashes // 4))
+            print(f"built {args.hashes} hashes in {time.perf_counter() - start:.1f}s, "
+                  f"{os.path.getsize(path) / 2**20:.1f} MiB on disk")
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        index = BreachIndex(path)
+        known = [index.digest_at(rng.randrange(len(index))) for _ in range(min(1000, len(index)))]
+
+        for label, digests in (
+            ("miss", [hashlib.sha1(os.urandom(16)).digest() for _ in range(args.lookups)]),
+            ("hit", [rng.choice(known) for _ in range(args.lookups)]),
+        ):
+            latencies = []
+            for digest in digests:
+                start = time.perf_counter()
+                found = index.contains_digest(digest)
+                latencies.append((time.perf_counter() - start) * 1e6)
+                assert found == (label == "hit")
+            print(f"{label:>4}: {percentiles(latencies)}")
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"peak RSS grew {(rss_after - rss_before) / 1024:.1f} MiB while querying "
+              f"{len(index)} hashes (mapped pages are shared and evictable)")
+        index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+from policy import DEFAULT_POLICY, SPECIAL, EntropyPool, compile_policy, generate_password, is_valid
+from collections import Counter
+import argparse
+import secrets
+import string
+import math
+import time
+
+def rejection_password(length):
+    # El generador anterior: candidatos completos hasta que uno cumpla
+    # las reglas. Es exactamente uniforme, pero su coste no está acotado.
+    alphabet = string.ascii_letters + string.digits + SPECIAL
+    attempts = 0
+    while True:
+        attempts += 1
+        candidate = "".join(secrets.choice(alphabet) for _ in range(length))
+        if (any(c.islower() for c in candidate) and
+            any(c.isupper() for c in candidate) and
+            sum(c.isdigit() for c in candidate) >= 2 and
+            any(c in SPECIAL for c in candidate)):
+            return candidate, attempts
+
+def chi2_pvalue(statistic, dof):
+    # Cola superior de chi-cuadrado (aproximación de Wilson-Hilferty)
+    if dof <= 0:
+        return 1.0
+    z = ((statistic / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def goodness_of_fit(observed, expected_probs, samples):
+    statistic = dof = 0
+    for key, prob in expected_probs.items():
+        expected = prob * samples
+        if expected >= 5:
+            statistic += (observed.get(key, 0) - expected) ** 2 / expected
+            dof += 1
+    return statistic, dof - 1, chi2_pvalue(statistic, dof - 1)
+
+def class_of(char, classes):
+    return next(index for index, (alphabet, _) in enumerate(classes) if char in alphabet)
+
+def exact_distributions(length):
+    # Distribuciones exactas sobre las contraseñas válidas, a partir de los
+    # mismos pesos que usa el generador: cuántos dígitos lleva la contraseña
+    # y a qué clase pertenece cada posición.
+    compiled = compile_policy(DEFAULT_POLICY.with_length(length))
+    total = compiled.total
+    digits, positions = Counter(), Counter()
+    for counts, weight in compiled.compositions():
+        digits[counts[2]] += weight / total
+        for index, count in enumerate(counts):
+            # Tras el barajado todas las posiciones siguen la misma distribución
+            for position in range(length):
+                positions[position, index] += weight / total * count / length / length
+    return digits, positions
+
+def distributions(passwords, classes):
+    digits, positions, chars = Counter(), Counter(), Counter()
+    for password in passwords:
+        digits[sum(c.isdigit() for c in password)] += 1
+        positions.update((position, class_of(c, classes)) for position, c in enumerate(password))
+        chars.update(password)
+    return digits, positions, chars
+
+def benchmark(length, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        generate_password(length)
+    constructive = (time.perf_counter() - start) / count
+    attempts, slowest = [], 0
+    start = time.perf_counter()
+    for _ in range(count):
+        tick = time.perf_counter()
+        attempts.append(rejection_password(length)[1])
+        slowest = max(slowest, time.perf_counter() - tick)
+    rejection = (time.perf_counter() - start) / count
+    print(f"length {length}: constructive {constructive * 1e6:.1f} µs, "
+          f"rejection {rejection * 1e6:.1f} µs (mean {sum(attempts) / count:.2f} attempts, "
+          f"worst {max(attempts)} attempts / {slowest * 1e6:.0f} µs)")
+
+def compare(length, samples):
+    entropy = EntropyPool()
+    classes = compile_policy(DEFAULT_POLICY.with_length(length)).classes
+    expected_digits, expected_positions = exact_distributions(length)
+    print(f"\nDistribution at length {length}, {samples} samples per generator (p < 0.001 flags a mismatch)")
+    for name, sample in (
+        ("constructive", lambda: generate_password(length)),
+        ("constructive, pooled entropy", lambda: generate_password(length, entropy.randbelow)),
+        ("rejection", lambda: rejection_password(length)[0]),
+    ):
+        passwords = [sample() for _ in range(samples)]
+        assert all(map(is_valid, passwords))
+        digits, positions, chars = distributions(passwords, classes)
+        total_chars = samples * length
+        print(f"  {name}:")
+        for label, observed, expected, n in (
+            ("digit count", digits, expected_digits, samples),
+            ("class per position", positions, expected_positions, total_chars),
+        ):
+            statistic, dof, p = goodness_of_fit(observed, expected, n)
+            print(f"    {label:<20} chi2={statistic:8.2f} dof={dof:3d} p={p:.3f}")
+        # Dentro de cada clase, todos los caracteres igual de probables
+        for index, (alphabet, _) in enumerate(classes):
+            in_class = sum(chars[c] for c in alphabet)
+            statistic, dof, p = goodness_of_fit(chars, {c: 1 / len(alphabet) for c in alphabet}, in_class)
+            print(f"    chars of class {index:<5} chi2={statistic:8.2f} dof={dof:3d} p={p:.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Constructive vs rejection password generation")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[12, 16, 20])
+    parser.add_argument("--count", type=int, default=20000, help="passwords timed per length")
+    parser.add_argument("--samples", type=int, default=50000, help="passwords per generator for the distribution check")
+    parser.add_argument("--check-length", type=int, default=12)
+    args = parser.parse_args()
+
+    for length in args.lengths:
+        benchmark(length, args.count)
+    compare(args.check_length, args.samples)
+
+if __name__ == "__main__":
+    main()
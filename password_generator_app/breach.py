@@ -0,0 +1,149 @@
+from contextlib import ExitStack
+import tempfile
+import hashlib
+import struct
+import heapq
+import mmap
+import os
+
+# Formato del índice:
+#   cabecera    MAGIC + número de hashes (uint64)
+#   tabla       65537 uint64: posición del primer hash de cada prefijo de
+#               2 bytes (la última entrada es el total)
+#   registros   los 18 bytes restantes de cada SHA-1, ordenados
+# El prefijo ya lo fija la tabla, así que no se guarda: cada consulta es un
+# salto a su cubeta y una búsqueda binaria dentro de ella sobre el mmap.
+MAGIC = b"PWBREACH1\0"
+HEADER = struct.Struct("<10sQ")
+PREFIX_BYTES = 2
+BUCKETS = 1 << (8 * PREFIX_BYTES)
+TABLE_OFFSET = HEADER.size
+RECORDS_OFFSET = TABLE_OFFSET + 8 * (BUCKETS + 1)
+DIGEST_SIZE = 20
+RECORD_SIZE = DIGEST_SIZE - PREFIX_BYTES
+
+DEFAULT_PATH = os.environ.get(
+    "PASSWORD_BREACH_INDEX", os.path.join(os.path.dirname(__file__), "breached.idx")
+)
+
+def parse_hashes(lines):
+    # Formato de HIBP: "SHA1HEX:CONTEO", una línea por hash. El conteo se ignora.
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield bytes.fromhex(line[:2 * DIGEST_SIZE].decode("ascii"))
+
+def _sorted_runs(digests, run_size, directory):
+    # Ordenación externa: tramos ordenados en disco para no cargar todo
+    # el fichero de entrada en memoria
+    run, runs = [], []
+    for digest in digests:
+        run.append(digest)
+        if len(run) == run_size:
+            runs.append(_write_run(sorted(run), directory))
+            run = []
+    if run:
+        runs.append(_write_run(sorted(run), directory))
+    return runs
+
+def _write_run(run, directory):
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as f:
+        f.write(b"".join(run))
+        return f.name
+
+def _read_run(f, block=DIGEST_SIZE * 4096):
+    while True:
+        data = f.read(block)
+        if not data:
+            return
+        for start in range(0, len(data), DIGEST_SIZE):
+            yield data[start:start + DIGEST_SIZE]
+
+def build_index(sources, path, run_size=2_000_000):
+    # sources: ficheros de texto con un SHA-1 en hexadecimal por línea
+    offsets = [0] * (BUCKETS + 1)
+    count = 0
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.TemporaryDirectory(dir=directory) as scratch, ExitStack() as stack:
+        def lines():
+            for source in sources:
+                with open(source, "rb") as f:
+                    yield from f
+        runs = [stack.enter_context(open(run, "rb")) for run in _sorted_runs(parse_hashes(lines()), run_size, scratch)]
+        with open(path + ".tmp", "wb") as out:
+            out.write(b"\0" * RECORDS_OFFSET)
+            previous = None
+            pending = []
+            for digest in heapq.merge(*map(_read_run, runs)):
+                if digest == previous:
+                    continue
+                previous = digest
+                offsets[int.from_bytes(digest[:PREFIX_BYTES], "big") + 1] += 1
+                pending.append(digest[PREFIX_BYTES:])
+                if len(pending) == 65536:
+                    out.write(b"".join(pending))
+                    count += len(pending)
+                    pending = []
+            out.write(b"".join(pending))
+            count += len(pending)
+            for bucket in range(BUCKETS):
+                offsets[bucket + 1] += offsets[bucket]
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, count))
+            out.write(struct.pack(f"<{BUCKETS + 1}Q", *offsets))
+    os.replace(path + ".tmp", path)
+    return count
+
+class BreachIndex:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a breach index")
+
+    @classmethod
+    def open_default(cls):
+        # Sin índice construido no hay comprobación
+        return cls(DEFAULT_PATH) if os.path.exists(DEFAULT_PATH) else None
+
+    def contains_digest(self, digest):
+        bucket = int.from_bytes(digest[:PREFIX_BYTES], "big")
+        lo, hi = struct.unpack_from("<2Q", self._map, TABLE_OFFSET + 8 * bucket)
+        key = digest[PREFIX_BYTES:]
+        data = self._map
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = RECORDS_OFFSET + mid * RECORD_SIZE
+            record = data[start:start + RECORD_SIZE]
+            if record < key:
+                lo = mid + 1
+            elif record > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def digest_at(self, position):
+        # El hash completo en una posición del orden (para muestreos y pruebas)
+        lo, hi = 0, BUCKETS
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if struct.unpack_from("<Q", self._map, TABLE_OFFSET + 8 * (mid + 1))[0] <= position:
+                lo = mid + 1
+            else:
+                hi = mid
+        start = RECORDS_OFFSET + position * RECORD_SIZE
+        return lo.to_bytes(PREFIX_BYTES, "big") + self._map[start:start + RECORD_SIZE]
+
+    def __contains__(self, password):
+        return self.contains_digest(hashlib.sha1(password.encode("utf-8")).digest())
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self._map.close()
+        self._file.close()
@@ -0,0 +1,20 @@
+from breach import DEFAULT_PATH, build_index
+import argparse
+import time
+import os
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline breached-password index from HIBP-style SHA-1 lists")
+    parser.add_argument("sources", nargs="+", help="text files with one SHA1HEX[:COUNT] per line")
+    parser.add_argument("--output", "-o", default=DEFAULT_PATH)
+    parser.add_argument("--run-size", type=int, default=2_000_000, help="hashes sorted in memory at a time")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = build_index(args.sources, args.output, args.run_size)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(args.output)
+    print(f"Indexed {count} unique hash(es) into {args.output} ({size / 2**20:.1f} MiB) in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,29 @@
 import flet as ft
-import secrets
-import string
+from policy import DEFAULT_POLICY, MAX_LENGTH, PasswordPolicy, compile_policy
+from breach import BreachIndex
+from session_pool import PasswordSession
 import pyperclip
+import os
 
-random = secrets.SystemRandom()
-contraseñas = []
+breach_index = BreachIndex.open_default()
+# Política del despliegue: un JSON con los campos de PasswordPolicy
+policy_path = os.environ.get("PASSWORD_POLICY")
+default_policy = PasswordPolicy.load(policy_path) if policy_path else DEFAULT_POLICY
+FIXED_LENGTHS = (12, 16, 20)
+# Con una política de pocas contraseñas posibles (cortas, solo dígitos) casi
+# todas pueden estar en el índice de filtradas: se corta tras estos intentos
+MAX_BREACH_RETRIES = 1000
 
 class PasswordGeneratorApp:
-    def __init__(self, page: ft.Page):
+    def __init__(self, page: ft.Page, policy=None):
         self.page = page
+        self.policy = policy or default_policy
+        self.minimum_length = compile_policy(self.policy.with_length(MAX_LENGTH)).minimum_length
+        # Solo las longitudes fijas que la política permite tienen botón habilitado y se precargan
+        self.lengths = tuple(n for n in FIXED_LENGTHS if n >= self.minimum_length)
+        # Cada sesión tiene sus propias contraseñas: nada se comparte entre páginas
+        self.session = PasswordSession(self.password, lengths=self.lengths)
+        self.current_password = None
         self.setup_page()
         self.setup_ui()
         self.add_to_page()
@@ -44,6 +59,20 @@ class PasswordGeneratorApp:
             read_only=True,
             hint_text="Your Password",
         )
+        self.entropy_text = ft.Text(size=11, color=ft.colors.WHITE54)
+        # El rango sigue al mínimo de la política aunque supere 64
+        slider_min = max(4, self.minimum_length)
+        slider_max = min(MAX_LENGTH, max(64, slider_min + 16))
+        self.length_slider = ft.Slider(
+            min=slider_min,
+            max=slider_max,
+            divisions=max(1, slider_max - slider_min),
+            value=min(slider_max, max(slider_min, self.policy.length)),
+            disabled=slider_min >= slider_max,
+            label="{value}",
+            width=250,
+            on_change_end=lambda e: self.text_field_value(int(e.control.value)),
+        )
         self.copy_button = ft.IconButton(
             icon=ft.icons.CONTENT_COPY,
             disabled=True,
@@ -52,15 +81,19 @@ class PasswordGeneratorApp:
 
         self.buttons_row = ft.Row(
             [
-                ft.FilledButton("12", on_click=lambda e: self.text_field_value(12), style=ft.ButtonStyle(shape=ft.CircleBorder(), padding=30)),
-                ft.FilledButton("16", on_click=lambda e: self.text_field_value(16), style=ft.ButtonStyle(shape=ft.CircleBorder(), padding=30)),
-                ft.FilledButton("20", on_click=lambda e: self.text_field_value(20), style=ft.ButtonStyle(shape=ft.CircleBorder(), padding=30)),
+                ft.FilledButton(
+                    str(length),
+                    on_click=lambda e, length=length: self.text_field_value(length),
+                    disabled=length not in self.lengths,
+                    style=ft.ButtonStyle(shape=ft.CircleBorder(), padding=30),
+                )
+                for length in FIXED_LENGTHS
             ],
         )
 
         self.main_container = ft.Container(
             width=275,
-            height=200,
+            height=280,
             clip_behavior=ft.ClipBehavior.HARD_EDGE,
             content=ft.Column(
                 horizontal_alignment=ft.CrossAxisAlignment.CENTER,
@@ -71,8 +104,10 @@ class PasswordGeneratorApp:
                             self.copy_button
                         ],
                     ),
-                    ft.Divider(height=20, color="transparent"),
-                    self.buttons_row
+                    self.entropy_text,
+                    ft.Divider(height=10, color="transparent"),
+                    self.buttons_row,
+                    self.length_slider
                 ],
             ),
         )
@@ -98,28 +133,33 @@ class PasswordGeneratorApp:
         self.page.update()
 
     def text_field_value(self, longitud):
-        self.password(longitud)
+        try:
+            self.current_password = self.session.take(longitud)
+        except ValueError:
+            self.page.snack_bar = ft.SnackBar(ft.Text(f"No se encontró una contraseña de {longitud} caracteres que no esté filtrada"))
+            self.page.snack_bar.open = True
+            self.page.update()
+            return
         self.copy_button.disabled = False
         self.copy_button.update()
-        self.text_field.value = contraseñas[0]
+        self.text_field.value = self.current_password
         self.text_field.update()
+        self.entropy_text.value = f"{compile_policy(self.policy.with_length(longitud)).entropy_bits:.1f} bits of entropy"
+        self.entropy_text.update()
 
     def password(self, longitud):
-        caract_esp = "#$%&'()*+-/:;<=>?@[\]^_`{|}~"
-        contra_seg = string.ascii_letters + string.digits + caract_esp
-        while True:
-            it_seg = ''.join(random.choice(contra_seg) for _ in range(longitud))
-            if (any(i.islower() for i in it_seg) and
-                any(i.isupper() for i in it_seg) and
-                sum(i.isdigit() for i in it_seg) >= 2 and
-                any(i in caract_esp for i in it_seg)):
-                if contraseñas:
-                    contraseñas.pop()
-                contraseñas.append(it_seg)
-                break
+        # Con el índice de contraseñas filtradas construido, una que aparezca
+        # en él se descarta y se genera otra
+        compiled = compile_policy(self.policy.with_length(longitud))
+        for _ in range(MAX_BREACH_RETRIES):
+            it_seg = compiled.generate()
+            if breach_index is None or it_seg not in breach_index:
+                return it_seg
+        raise ValueError(f"no password of length {longitud} outside the breach index after {MAX_BREACH_RETRIES} tries")
 
     def copy_function(self, e):
-        pyperclip.copy(contraseñas[0])
+        pyperclip.copy(self.current_password)
+        self.session.remember(self.current_password)
         self.page.snack_bar = ft.SnackBar(ft.Text("Contraseña copiada al portapapeles"))
         self.page.snack_bar.open = True
         self.page.update()
@@ -0,0 +1,203 @@
+from dataclasses import dataclass, asdict, replace
+from functools import lru_cache
+from itertools import accumulate
+from bisect import bisect_right
+from math import comb, factorial, log2
+import secrets
+import string
+import json
+import os
+
+SPECIAL = r"#$%&'()*+-/:;<=>?@[\]^_`{|}~"
+AMBIGUOUS = "Il1O0o|`'"
+MAX_LENGTH = 128
+
+@dataclass(frozen=True)
+class PasswordPolicy:
+    # Descripción declarativa de una política; se compila una sola vez con
+    # compile_policy. Es inmutable y hashable, así que sirve de clave de caché.
+    length: int = 16
+    min_lower: int = 1
+    min_upper: int = 1
+    min_digits: int = 2
+    min_symbols: int = 1
+    symbols: str = SPECIAL
+    exclude: str = ""
+
+    def with_length(self, length):
+        return self if length == self.length else replace(self, length=length)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self):
+        return asdict(self)
+
+DEFAULT_POLICY = PasswordPolicy()
+
+def _counts(length, minimums):
+    # Todas las formas de repartir length caracteres entre las clases
+    # respetando los mínimos
+    if len(minimums) == 1:
+        if length >= minimums[0]:
+            yield (length,)
+        return
+    for count in range(minimums[0], length - sum(minimums[1:]) + 1):
+        for rest in _counts(length - count, minimums[1:]):
+            yield (count, *rest)
+
+class CompiledPolicy:
+    # El plan de colocación de una política. Una contraseña válida se arma
+    # eligiendo cuántos caracteres lleva cada clase, rellenándolos y
+    # barajando; para que el resultado sea uniforme sobre todas las válidas,
+    # cada reparto debe pesar multinomial(length; counts) * prod(len(alfabeto) ** count).
+    # En lugar de enumerar los repartos (cientos de miles a length 128) se
+    # elige la cantidad de cada clase por turnos: ways[k][n] cuenta las
+    # formas de llenar n posiciones con las clases k en adelante, y plan[k][n]
+    # guarda los pesos acumulados de cada cantidad posible para la clase k.
+    # Generar cuesta lo mismo sea cual sea la política.
+    def __init__(self, policy):
+        if not 1 <= policy.length <= MAX_LENGTH:
+            raise ValueError(f"length must be between 1 and {MAX_LENGTH}")
+        excluded = set(policy.exclude)
+        classes = []
+        seen = set()
+        for alphabet, minimum in (
+            (string.ascii_lowercase, policy.min_lower),
+            (string.ascii_uppercase, policy.min_upper),
+            (string.digits, policy.min_digits),
+            (policy.symbols, policy.min_symbols),
+        ):
+            if minimum < 0:
+                raise ValueError("class minimums cannot be negative")
+            alphabet = "".join(dict.fromkeys(c for c in alphabet if c not in excluded))
+            if seen.intersection(alphabet):
+                raise ValueError("symbols cannot repeat letters or digits")
+            seen.update(alphabet)
+            if not alphabet:
+                if minimum:
+                    raise ValueError("a required character class is empty after exclusions")
+                continue
+            classes.append((alphabet, minimum))
+        if not classes:
+            raise ValueError("the policy leaves no characters to use")
+        self.policy = policy
+        self.classes = tuple(classes)
+        self.minimum_length = sum(minimum for _, minimum in classes)
+        length = policy.length
+        if length < self.minimum_length:
+            raise ValueError(f"length {length} is shorter than the {self.minimum_length} required characters")
+
+        last_alphabet, last_minimum = classes[-1]
+        ways = [len(last_alphabet) ** n if n >= last_minimum else 0 for n in range(length + 1)]
+        self.plan = []
+        for alphabet, minimum in reversed(classes[:-1]):
+            plan, next_ways = [], [0] * (length + 1)
+            for n in range(length + 1):
+                cumulative = list(accumulate(
+                    comb(n, count) * len(alphabet) ** count * ways[n - count]
+                    for count in range(minimum, n + 1)
+                ))
+                plan.append(cumulative)
+                next_ways[n] = cumulative[-1] if cumulative else 0
+            self.plan.insert(0, plan)
+            ways = next_ways
+        self.total = ways[length]
+        # Entropía exacta: log2 del número de contraseñas válidas
+        self.entropy_bits = log2(self.total)
+
+    def sample_counts(self, randbelow=secrets.randbelow):
+        remaining = self.policy.length
+        counts = []
+        for (_, minimum), plan in zip(self.classes, self.plan):
+            cumulative = plan[remaining]
+            count = minimum + bisect_right(cumulative, randbelow(cumulative[-1]))
+            counts.append(count)
+            remaining -= count
+        counts.append(remaining)
+        return counts
+
+    def generate(self, randbelow=secrets.randbelow):
+        chars = [
+            alphabet[randbelow(len(alphabet))]
+            for (alphabet, _), count in zip(self.classes, self.sample_counts(randbelow))
+            for _ in range(count)
+        ]
+        return "".join(shuffle(chars, randbelow))
+
+    def compositions(self):
+        # Todos los repartos con su peso exacto (para análisis, no para generar)
+        for counts in _counts(self.policy.length, [minimum for _, minimum in self.classes]):
+            weight = factorial(self.policy.length)
+            for (alphabet, _), count in zip(self.classes, counts):
+                weight = weight // factorial(count) * len(alphabet) ** count
+            yield counts, weight
+
+    def is_valid(self, password):
+        if len(password) != self.policy.length:
+            return False
+        allowed = "".join(alphabet for alphabet, _ in self.classes)
+        return all(char in allowed for char in password) and all(
+            sum(char in alphabet for char in password) >= minimum for alphabet, minimum in self.classes
+        )
+
+@lru_cache(maxsize=256)
+def compile_policy(policy):
+    # Compartido por todas las sesiones del proceso
+    return CompiledPolicy(policy)
+
+class EntropyPool:
+    # Bytes de os.urandom pedidos en bloques grandes en lugar de una llamada
+    # al sistema por carácter. randbelow descarta los valores que sesgarían
+    # el resultado, igual que secrets.randbelow. Si el proceso se bifurca el
+    # hijo tira el búfer heredado para no repetir los bytes del padre.
+    def __init__(self, block_size=1 << 16):
+        self.block_size = block_size
+        self.buffer = b""
+        self.offset = 0
+        self.pid = os.getpid()
+
+    def take(self, size):
+        if self.pid != os.getpid():
+            self.buffer, self.offset, self.pid = b"", 0, os.getpid()
+        if self.offset + size > len(self.buffer):
+            self.buffer = self.buffer[self.offset:] + os.urandom(max(self.block_size, size))
+            self.offset = 0
+        self.offset += size
+        return self.buffer[self.offset - size:self.offset]
+
+    def randbelow(self, n):
+        if n <= 256:
+            limit = 256 - 256 % n
+            while True:
+                value = self.take(1)[0]
+                if value < limit:
+                    return value % n
+        bits = n.bit_length()
+        size = (bits + 7) // 8
+        while True:
+            value = int.from_bytes(self.take(size), "big") >> (size * 8 - bits)
+            if value < n:
+                return value
+
+def shuffle(chars, randbelow=secrets.randbelow):
+    # Fisher-Yates: cada permutación es igual de probable
+    for i in range(len(chars) - 1, 0, -1):
+        j = randbelow(i + 1)
+        chars[i], chars[j] = chars[j], chars[i]
+    return chars
+
+def generate_password(length, randbelow=secrets.randbelow, policy=DEFAULT_POLICY):
+    return compile_policy(policy.with_length(length)).generate(randbelow)
+
+def is_valid(password, policy=DEFAULT_POLICY):
+    try:
+        return compile_policy(policy.with_length(len(password))).is_valid(password)
+    except ValueError:
+        return False
@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import threading
+
+# Compartido solo para repartir el trabajo; cada sesión rellena sus propias colas
+refill_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="password-refill")
+
+class PasswordSession:
+    # Estado de una sesión de la app: unas pocas contraseñas ya generadas por
+    # longitud, para que un clic solo tenga que sacar una de la cola, y el
+    # historial de copiadas en un anillo acotado. Cuando una cola baja de
+    # low_water se rellena en segundo plano; el handler nunca espera al
+    # relleno y solo genera en el momento si la cola está vacía.
+    def __init__(self, generate, lengths=(12, 16, 20), pool_size=8, low_water=3, history_size=20, executor=None):
+        self.generate = generate
+        self.pool_size = pool_size
+        self.low_water = low_water
+        self.pools = {length: deque() for length in lengths}
+        self.history = deque(maxlen=history_size)
+        self.executor = executor or refill_executor
+        self._refilling = set()
+        self._lock = threading.Lock()
+        for length in lengths:
+            self.schedule_refill(length)
+
+    def take(self, length):
+        pool = self.pools.setdefault(length, deque())
+        try:
+            password = pool.popleft()
+        except IndexError:
+            password = self.generate(length)
+        if len(pool) < self.low_water:
+            self.schedule_refill(length)
+        return password
+
+    def schedule_refill(self, length):
+        with self._lock:
+            if length in self._refilling:
+                return
+            self._refilling.add(length)
+        self.executor.submit(self._refill, length)
+
+    def _refill(self, length):
+        try:
+            pool = self.pools[length]
+            while len(pool) < self.pool_size:
+                pool.append(self.generate(length))
+        finally:
+            with self._lock:
+                self._refilling.discard(length)
+
+    def remember(self, password):
+        self.history.append(password)
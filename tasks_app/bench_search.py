@@ -0,0 +1,106 @@
+from flet_core.protocol import PageCommandsBatchResponsePayload, PageCommandResponsePayload
+from flet_core.connection import Connection
+import task_manager
+from task_manager import Database, TaskFeed, SEARCH_DEBOUNCE
+import flet as ft
+import argparse
+import asyncio
+import tempfile
+import random
+import sqlite3
+import time
+import os
+
+SYLLABLES = ["ka", "lo", "mi", "ren", "ta", "sol", "vi", "dor", "pe", "nu", "gra", "ber", "tis", "on", "qua", "zel"]
+
+class NullConnection(Connection):
+    # Página sin cliente: acepta los diffs y da ids correlativos a los
+    # controles nuevos, así se mide también armar y serializar las filas
+    def __init__(self):
+        super().__init__()
+        self._next_id = 0
+
+    def send_commands(self, session_id, commands):
+        results = []
+        for command in commands:
+            if command.name == "add":
+                ids = range(self._next_id, self._next_id + len(command.commands))
+                self._next_id += len(command.commands)
+                results.append(" ".join(f"_{i}" for i in ids))
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+    def send_command(self, session_id, command):
+        return PageCommandResponsePayload(result="", error="")
+
+def make_feed():
+    page = ft.Page(NullConnection(), "bench", asyncio.new_event_loop())
+    list_view = ft.ListView(height=500)
+    page.add(list_view)
+    feed = TaskFeed(list_view, lambda e, c: None, lambda e, c: None)
+    feed.load_initial()
+    list_view.update()
+    return feed
+
+def make_vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+def populate(path, count, rng, vocabulary):
+    task_manager.db_path = path
+    Database.connect_to_database()
+    with sqlite3.connect(path) as db:
+        existing = db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+        rows = ((" ".join(rng.choices(vocabulary, k=rng.randint(2, 8))), 1704099600)
+                for _ in range(count - existing))
+        db.executemany("INSERT INTO tasks (Task, created_at) VALUES (?, ?)", rows)
+        db.commit()
+
+def keystrokes(rng, vocabulary, sessions):
+    # Cada usuario simulado escribe una o dos palabras, letra por letra
+    for _ in range(sessions):
+        typed = ""
+        for word in rng.sample(vocabulary, rng.randint(1, 2)):
+            typed += " " if typed else ""
+            for char in word:
+                typed += char
+                yield typed
+
+def main():
+    parser = argparse.ArgumentParser(description="Keystroke-to-result latency of the FTS5 task search")
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--sessions", type=int, default=100, help="simulated typing sessions")
+    parser.add_argument("--db", help="reuse (and top up) this database instead of a temporary one")
+    parser.add_argument("--budget-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng, 20000)
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.db or os.path.join(directory, "tm.db")
+        start = time.perf_counter()
+        populate(path, args.tasks, rng, vocabulary)
+        print(f"{args.tasks} tasks ready in {time.perf_counter() - start:.1f}s")
+
+        # El camino de la app sin la pausa: consulta FTS, filas a controles
+        # y el diff del ListView. La pausa se suma aparte.
+        feed = make_feed()
+        latencies = []
+        for text in keystrokes(rng, vocabulary, args.sessions):
+            feed.search_generation += 1
+            start = time.perf_counter()
+            feed.search(text, feed.search_generation)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+    debounce = SEARCH_DEBOUNCE * 1000
+    print(f"{len(latencies)} keystrokes, TaskFeed.search: p50={pick(0.5):.2f}ms p95={pick(0.95):.2f}ms "
+          f"p99={pick(0.99):.2f}ms max={latencies[-1]:.2f}ms")
+    total = debounce + pick(0.99)
+    print(f"keystroke to result p99 = {debounce:.0f} ms debounce + {pick(0.99):.2f}ms = {total:.2f}ms, "
+          f"{'within' if total <= args.budget_ms else 'OVER'} the {args.budget_ms:.0f} ms budget")
+
+if __name__ == "__main__":
+    main()
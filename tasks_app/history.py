@@ -0,0 +1,103 @@
+from contextlib import contextmanager
+import json
+
+UNDO, REDO = 0, 1
+
+@contextmanager
+def transaction(db):
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+def fetch_rows(db, task_ids):
+    return [list(row) for row in db.execute(
+        "SELECT id, Task, created_at, due_at FROM tasks WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id",
+        (json.dumps(task_ids),),
+    )]
+
+# Cada operación se aplica y devuelve la que la deshace:
+#   ("insert", [[id, Task, created_at, due_at], ...])  <->  ("delete", [id, ...])
+#   ("update", [[id, Task], ...])                      <->  ("update", [[id, Task anterior], ...])
+# Un id None en insert deja que SQLite lo asigne (una tarea nueva).
+def apply(db, op, args):
+    if op == "insert":
+        task_ids = []
+        for task_id, task, created_at, due_at in args:
+            cursor = db.execute(
+                "INSERT INTO tasks (id, Task, created_at, due_at) VALUES (?, ?, ?, ?)",
+                (task_id, task, created_at, due_at),
+            )
+            task_ids.append(cursor.lastrowid)
+        return "delete", task_ids
+    if op == "delete":
+        rows = fetch_rows(db, args)
+        db.execute("DELETE FROM tasks WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(args),))
+        return "insert", rows
+    if op == "update":
+        previous = [[task_id, task] for task_id, task, _, _ in fetch_rows(db, [task_id for task_id, _ in args])]
+        db.executemany("UPDATE tasks SET Task = ? WHERE id = ?", [(task, task_id) for task_id, task in args])
+        return "update", previous
+    raise ValueError(f"unknown operation {op!r}")
+
+class CommandLog:
+    # Pilas de deshacer/rehacer guardadas en task_history, así sobreviven a un
+    # reinicio. Solo se guardan las operaciones inversas, en JSON compacto, y
+    # cada pila es un anillo: al pasar de limit entradas o de max_bytes se
+    # descartan las más antiguas (la más reciente se conserva siempre).
+    def __init__(self, limit=100, max_bytes=1 << 20):
+        self.limit = limit
+        self.max_bytes = max_bytes
+
+    def push(self, db, stack, op, args):
+        db.execute(
+            "INSERT INTO task_history (stack, op, args) VALUES (?, ?, ?)",
+            (stack, op, json.dumps(args, separators=(",", ":"), ensure_ascii=False)),
+        )
+        db.execute("""
+            DELETE FROM task_history WHERE stack = :stack AND seq < (
+                SELECT MIN(seq) FROM (
+                    SELECT seq,
+                           ROW_NUMBER() OVER newest AS position,
+                           SUM(length(args)) OVER newest AS total
+                    FROM task_history WHERE stack = :stack
+                    WINDOW newest AS (ORDER BY seq DESC)
+                ) WHERE position <= :limit AND (total <= :max_bytes OR position = 1)
+            )
+        """, {"stack": stack, "limit": self.limit, "max_bytes": self.max_bytes})
+
+    def pop(self, db, stack):
+        row = db.execute(
+            "SELECT seq, op, args FROM task_history WHERE stack = ? ORDER BY seq DESC LIMIT 1", (stack,)
+        ).fetchone()
+        if row is None:
+            return None
+        db.execute("DELETE FROM task_history WHERE seq = ?", (row[0],))
+        return row[1], json.loads(row[2])
+
+    def execute(self, db, op, args):
+        # Una acción nueva del usuario invalida lo que se podía rehacer
+        inverse = apply(db, op, args)
+        self.push(db, UNDO, *inverse)
+        db.execute("DELETE FROM task_history WHERE stack = ?", (REDO,))
+        return inverse
+
+    def step(self, db, source, target):
+        command = self.pop(db, source)
+        if command is None:
+            return None
+        self.push(db, target, *apply(db, *command))
+        return command
+
+    def undo(self, db):
+        return self.step(db, UNDO, REDO)
+
+    def redo(self, db):
+        return self.step(db, REDO, UNDO)
+
+    def depth(self, db):
+        counts = dict(db.execute("SELECT stack, COUNT(*) FROM task_history GROUP BY stack"))
+        return counts.get(UNDO, 0), counts.get(REDO, 0)
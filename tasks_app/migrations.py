@@ -0,0 +1,117 @@
+import threading
+
+FTS_INSERT_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts (rowid, Task) VALUES (new.id, new.Task);
+    END
+"""
+
+FTS_TRIGGERS = [
+    FTS_INSERT_TRIGGER,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, Task) VALUES ('delete', old.id, old.Task);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF Task ON tasks BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, Task) VALUES ('delete', old.id, old.Task);
+        INSERT INTO tasks_fts (rowid, Task) VALUES (new.id, new.Task);
+    END
+    """,
+]
+
+# Las filas viejas guardan la hora local como "Jan 05, 2024  13:45"; las que
+# no se pueden leer quedan con la hora de la migración.
+LEGACY_DATE_TO_EPOCH = """
+    COALESCE(CAST(strftime('%s', printf('%s-%02d-%s %s:00',
+        substr(Date, 9, 4),
+        (instr('JanFebMarAprMayJunJulAugSepOctNovDec', substr(Date, 1, 3)) + 2) / 3,
+        substr(Date, 5, 2),
+        substr(Date, 15, 5)), 'utc') AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER))
+"""
+
+# Cada migración es (versión, sentencias). Corren en orden, una transacción
+# por versión, y PRAGMA user_version guarda la última aplicada: los tm.db
+# existentes se actualizan en el lugar.
+MIGRATIONS = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            Task TEXT NOT NULL,
+            Date TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            Task, content='tasks', content_rowid='id',
+            prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        *FTS_TRIGGERS,
+        "INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')",
+    ]),
+    # Las fechas ya formateadas pasan a un epoch indexado más un vencimiento
+    # opcional. Borrar la tabla vieja borra sus triggers, así que se recrean.
+    (2, [
+        """
+        CREATE TABLE tasks_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            Task TEXT NOT NULL,
+            created_at INTEGER NOT NULL,
+            due_at INTEGER
+        )
+        """,
+        f"INSERT INTO tasks_new (id, Task, created_at) SELECT id, Task, {LEGACY_DATE_TO_EPOCH} FROM tasks",
+        "DROP TABLE tasks",
+        "ALTER TABLE tasks_new RENAME TO tasks",
+        "CREATE INDEX tasks_when ON tasks (COALESCE(due_at, created_at))",
+        "CREATE INDEX tasks_due_at ON tasks (due_at) WHERE due_at IS NOT NULL",
+        *FTS_TRIGGERS,
+        "INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')",
+    ]),
+    # Pilas de deshacer/rehacer (ver history.py)
+    (3, [
+        """
+        CREATE TABLE task_history (
+            seq INTEGER PRIMARY KEY,
+            stack INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            args TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX task_history_stack ON task_history (stack, seq)",
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+_lock = threading.Lock()
+_migrated = set()
+
+def migrate(db):
+    version = db.execute("PRAGMA user_version").fetchone()[0]
+    for target, statements in MIGRATIONS:
+        if target <= version:
+            continue
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in statements:
+                db.execute(statement)
+            db.execute(f"PRAGMA user_version = {target}")
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return max(version, SCHEMA_VERSION)
+
+def ensure_schema(path, db):
+    # Cada sesión lo llama; solo la primera llamada por archivo de base en
+    # este proceso toca el esquema.
+    if path in _migrated:
+        return
+    with _lock:
+        if path not in _migrated:
+            migrate(db)
+            _migrated.add(path)
@@ -0,0 +1,102 @@
+import task_manager
+from task_manager import Database
+from datetime import datetime
+import argparse
+import json
+import time
+import csv
+import sys
+
+FIELDS = ["task", "created_at", "due_at"]
+
+def parse_time(value):
+    # Segundos epoch o ISO 8601 ("2024-01-05T13:45"); vacío es sin valor
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) or str(value).lstrip("-").isdigit():
+        return int(value)
+    return int(datetime.fromisoformat(value).timestamp())
+
+def detect_format(path, fmt):
+    if fmt:
+        return fmt
+    return "jsonl" if path and path.endswith((".jsonl", ".ndjson")) else "csv"
+
+def read_records(f, fmt):
+    if fmt == "jsonl":
+        return (json.loads(line) for line in f if line.strip())
+    return csv.DictReader(f)
+
+def to_rows(records):
+    now = int(time.time())
+    for number, record in enumerate(records, 1):
+        task = record.get("task")
+        if not task:
+            raise ValueError(f"record {number} has no task")
+        try:
+            yield task, parse_time(record.get("created_at")) or now, parse_time(record.get("due_at"))
+        except ValueError as error:
+            raise ValueError(f"record {number}: {error}") from None
+
+def import_tasks(f, fmt, chunk_size=5000):
+    return Database.import_tasks(to_rows(read_records(f, fmt)), chunk_size)
+
+def export_tasks(out, fmt, batch_size=1000):
+    count = 0
+    if fmt == "jsonl":
+        for row in Database.iter_tasks(batch_size):
+            out.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + "\n")
+            count += 1
+        return count
+    writer = csv.writer(out)
+    writer.writerow(FIELDS)
+    for row in Database.iter_tasks(batch_size):
+        writer.writerow(row)
+        count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import/export of tasks as CSV or JSONL")
+    parser.add_argument("--db", help="database file (defaults to the app's tm.db)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file extension, else csv")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="stream tasks from a file with task,created_at,due_at fields")
+    import_parser.add_argument("path", nargs="?", help="input file (defaults to stdin)")
+    import_parser.add_argument("--chunk-size", type=int, default=5000)
+
+    export_parser = commands.add_parser("export", help="stream all tasks, oldest first")
+    export_parser.add_argument("path", nargs="?", help="output file (defaults to stdout)")
+    export_parser.add_argument("--batch-size", type=int, default=1000)
+
+    args = parser.parse_args()
+    if args.db:
+        task_manager.db_path = args.db
+    Database.connect_to_database()
+    fmt = detect_format(args.path, args.format)
+    start = time.perf_counter()
+
+    if args.command == "import":
+        # Los lotes ya confirmados se quedan; el lote con el registro malo no
+        try:
+            if args.path:
+                with open(args.path, newline="", encoding="utf-8") as f:
+                    count = import_tasks(f, fmt, args.chunk_size)
+            else:
+                count = import_tasks(sys.stdin, fmt, args.chunk_size)
+        except ValueError as error:
+            sys.exit(f"Import stopped at {error}")
+        verb = "Imported"
+    else:
+        if args.path:
+            with open(args.path, "w", newline="", encoding="utf-8") as out:
+                count = export_tasks(out, fmt, args.batch_size)
+        else:
+            count = export_tasks(sys.stdout, fmt, args.batch_size)
+        verb = "Exported"
+
+    elapsed = time.perf_counter() - start
+    print(f"{verb} {count} task(s) in {elapsed:.2f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
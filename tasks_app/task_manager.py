@@ -1,49 +1,243 @@
+from contextlib import closing
 from datetime import datetime
 from flet import *
-import pandas as pd
+from migrations import FTS_INSERT_TRIGGER, ensure_schema
+from history import CommandLog, transaction
+import threading
+import asyncio
 import sqlite3
 import time
+import json
 import os
+import re
 
 db_path = os.path.join(os.path.dirname(__file__), "tm.db")
+# Pausa tras cada tecla antes de consultar. Cuenta dentro del presupuesto de
+# 50 ms de tecla a resultado (bench_search.py la suma); una consulta que
+# queda vieja igual se descarta por search_generation.
+SEARCH_DEBOUNCE = 0.03
+history = CommandLog()
+
+def local_epoch(*modifiers):
+    # Límites del día/semana en hora local, convertidos a epoch UTC por SQLite
+    args = ", ".join(f"'{m}'" for m in ("now", "localtime", "start of day", *modifiers, "utc"))
+    return f"CAST(strftime('%s', {args}) AS INTEGER)"
+
+# Vistas: (condición, consulta que calcula sus límites). Los límites salen
+# de SQLite pero se pasan como parámetros: con strftime('now') dentro de la
+# condición el planificador no usa el índice tasks_when ni el parcial de due_at.
+# El "due_at > 0" de overdue cierra el rango por el mismo motivo.
+WHEN = "COALESCE(due_at, created_at)"
+VIEWS = {
+    "all": ("1", None),
+    "today": (f"{WHEN} >= ? AND {WHEN} < ?", f"SELECT {local_epoch()}, {local_epoch('+1 day')}"),
+    "week": (
+        f"{WHEN} >= ? AND {WHEN} < ?",
+        f"SELECT {local_epoch('-6 days', 'weekday 1')}, {local_epoch('-6 days', 'weekday 1', '+7 days')}",
+    ),
+    "overdue": ("due_at > 0 AND due_at < ?", "SELECT CAST(strftime('%s', 'now') AS INTEGER)"),
+}
+
+def view_filter(db, view):
+    condition, bounds = VIEWS[view]
+    return condition, db.execute(bounds).fetchone() if bounds else ()
+
+def page_key(bounds):
+    # Con una vista activa el "+" impide que el rango de ids le gane al índice
+    # de la vista, que es mucho más selectivo
+    return "+id" if bounds else "id"
+
+def format_task_date(created_at, due_at=None):
+    label = datetime.fromtimestamp(created_at).strftime("%b %d, %Y  %H:%M")
+    if due_at is not None:
+        label += datetime.fromtimestamp(due_at).strftime("  ·  due %b %d")
+    return label
+
+def iter_chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def fts_query(text):
+    # Cada palabra se busca como prefijo. Las de una letra se ignoran hasta
+    # que crecen: no tienen índice de prefijo y apenas filtran.
+    terms = [term for term in re.findall(r"\w+", text) if len(term) > 1]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+# Las coincidencias más recientes, las únicas que se ordenan por relevancia
+SEARCH_WINDOW = """
+    SELECT tasks_fts.rowid, tasks_fts.rank FROM tasks_fts
+    JOIN tasks ON tasks.id = tasks_fts.rowid
+    WHERE tasks_fts MATCH ? AND {condition}
+    ORDER BY tasks_fts.rowid DESC LIMIT ?
+"""
 
 class Database:
     @staticmethod
     def connect_to_database():
         with sqlite3.connect(db_path) as db:
-            db.execute("""
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    Task TEXT NOT NULL,
-                    Date TEXT NOT NULL
-                )
-            """)
-            db.commit()
+            ensure_schema(db_path, db)
+
+    @staticmethod
+    def iter_tasks(batch_size=1000):
+        # Recorre la tabla con un cursor: en memoria nunca hay más de un lote
+        with closing(sqlite3.connect(db_path)) as db:
+            cursor = db.execute("SELECT Task, created_at, due_at FROM tasks ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
 
     @staticmethod
-    def read_database():
+    def import_tasks(rows, chunk_size=5000):
+        # Un executemany y una transacción por lote en lugar de un commit por
+        # fila. El trigger de FTS por fila cuesta más que la inserción misma,
+        # así que dentro de la transacción se quita y el lote se indexa con un
+        # solo INSERT ... SELECT; ninguna otra conexión llega a verlo sin trigger.
+        imported = 0
+        with closing(sqlite3.connect(db_path)) as db:
+            for chunk in iter_chunks(rows, chunk_size):
+                with transaction(db):
+                    last_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+                    db.execute("DROP TRIGGER tasks_fts_insert")
+                    db.executemany("INSERT INTO tasks (Task, created_at, due_at) VALUES (?, ?, ?)", chunk)
+                    db.execute("INSERT INTO tasks_fts (rowid, Task) SELECT id, Task FROM tasks WHERE id > ?", (last_id,))
+                    db.execute(FTS_INSERT_TRIGGER)
+                imported += len(chunk)
+        return imported
+
+    @staticmethod
+    def read_page(before_id=None, limit=50, view="all"):
+        # Paginación por clave: cada página arranca después del último id visto
         with sqlite3.connect(db_path) as db:
-            return pd.read_sql_query("SELECT Task, Date FROM tasks", db).values.tolist()
+            condition, bounds = view_filter(db, view)
+            if before_id is None:
+                return db.execute(
+                    f"SELECT id, Task, created_at, due_at FROM tasks WHERE {condition} ORDER BY id DESC LIMIT ?",
+                    (*bounds, limit),
+                ).fetchall()
+            return db.execute(
+                f"SELECT id, Task, created_at, due_at FROM tasks WHERE {condition} AND {page_key(bounds)} < ? ORDER BY id DESC LIMIT ?",
+                (*bounds, before_id, limit),
+            ).fetchall()
 
     @staticmethod
-    def insert_into_database(values):
+    def read_page_after(after_id, limit=50, view="all"):
         with sqlite3.connect(db_path) as db:
-            db.execute("INSERT INTO tasks (Task, Date) VALUES (?, ?)", values)
-            db.commit()
+            condition, bounds = view_filter(db, view)
+            rows = db.execute(
+                f"SELECT id, Task, created_at, due_at FROM tasks WHERE {condition} AND {page_key(bounds)} > ? ORDER BY id ASC LIMIT ?",
+                (*bounds, after_id, limit),
+            ).fetchall()
+        return rows[::-1]
 
     @staticmethod
-    def delete_task_from_database(task):
+    def search_tasks(query, offset=0, limit=50, candidates=1000, view="all", before_id=None):
+        # Ordenar por relevancia todas las coincidencias de un prefijo corto
+        # cuesta cientos de ms con millones de filas: se ordenan solo las
+        # coincidencias más recientes, que FTS5 recorre por rowid y corta en LIMIT.
+        # El filtro de la vista va dentro para que el corte no deje fuera sus filas.
+        # Pasada esa ventana las coincidencias más viejas siguen por id
+        # (paginación por clave desde before_id), así que ninguna queda fuera.
         with sqlite3.connect(db_path) as db:
-            db.execute("DELETE FROM tasks WHERE Task = ?", (task,))
-            db.commit()
+            condition, bounds = view_filter(db, view)
+            window = SEARCH_WINDOW.format(condition=condition)
+            rows = db.execute(f"""
+                SELECT tasks.id, tasks.Task, tasks.created_at, tasks.due_at FROM ({window}) AS matches
+                JOIN tasks ON tasks.id = matches.rowid
+                ORDER BY matches.rank LIMIT ? OFFSET ?
+            """, (query, *bounds, candidates, limit, offset)).fetchall()
+            if len(rows) == limit:
+                return rows
+            count, cutoff = db.execute(
+                f"SELECT COUNT(*), MIN(rowid) FROM ({window})", (query, *bounds, candidates)
+            ).fetchone()
+            if count < candidates:
+                return rows
+            if before_id is not None:
+                cutoff = min(cutoff, before_id)
+            return rows + db.execute(f"""
+                SELECT tasks.id, tasks.Task, tasks.created_at, tasks.due_at FROM tasks_fts
+                JOIN tasks ON tasks.id = tasks_fts.rowid
+                WHERE tasks_fts MATCH ? AND {condition} AND tasks_fts.rowid < ?
+                ORDER BY tasks_fts.rowid DESC LIMIT ?
+            """, (query, *bounds, cutoff, limit - len(rows))).fetchall()
 
     @staticmethod
-    def update_task_in_database(old_task, new_task):
+    def search_tasks_newer(query, start, end, after_id, candidates=1000, view="all"):
+        # Las posiciones [start, end) al volver hacia arriba: las que caen en
+        # la ventana salen por relevancia y las de más allá, por id desde after_id
         with sqlite3.connect(db_path) as db:
-            db.execute("UPDATE tasks SET Task = ? WHERE Task = ?", (new_task, old_task))
-            db.commit()
+            condition, bounds = view_filter(db, view)
+            window = SEARCH_WINDOW.format(condition=condition)
+            count, cutoff = db.execute(
+                f"SELECT COUNT(*), MIN(rowid) FROM ({window})", (query, *bounds, candidates)
+            ).fetchone()
+            rows = []
+            if start < count:
+                rows = db.execute(f"""
+                    SELECT tasks.id, tasks.Task, tasks.created_at, tasks.due_at FROM ({window}) AS matches
+                    JOIN tasks ON tasks.id = matches.rowid
+                    ORDER BY matches.rank LIMIT ? OFFSET ?
+                """, (query, *bounds, candidates, min(end, count) - start, start)).fetchall()
+            if end > max(start, count):
+                rows += db.execute(f"""
+                    SELECT tasks.id, tasks.Task, tasks.created_at, tasks.due_at FROM tasks_fts
+                    JOIN tasks ON tasks.id = tasks_fts.rowid
+                    WHERE tasks_fts MATCH ? AND {condition} AND tasks_fts.rowid > ? AND tasks_fts.rowid < ?
+                    ORDER BY tasks_fts.rowid ASC LIMIT ?
+                """, (query, *bounds, after_id, cutoff, end - max(start, count))).fetchall()[::-1]
+            return rows
+
+    # Las escrituras del usuario pasan por el registro de comandos: la
+    # operación y su inversa se guardan en la misma transacción
+    @staticmethod
+    def run_command(op, args):
+        with closing(sqlite3.connect(db_path)) as db, transaction(db):
+            return history.execute(db, op, args)
+
+    @staticmethod
+    def insert_into_database(values):
+        _, (task_id,) = Database.run_command("insert", [[None, *values]])
+        return task_id
+
+    @staticmethod
+    def delete_task_from_database(task_id):
+        Database.run_command("delete", [task_id])
+
+    @staticmethod
+    def delete_tasks_from_database(task_ids):
+        # Una sola sentencia sin importar cuántos ids: se pasan como un array JSON
+        Database.run_command("delete", list(task_ids))
+
+    @staticmethod
+    def update_task_in_database(task_id, new_task):
+        Database.run_command("update", [[task_id, new_task]])
+
+    @staticmethod
+    def undo():
+        with closing(sqlite3.connect(db_path)) as db, transaction(db):
+            return history.undo(db)
+
+    @staticmethod
+    def redo():
+        with closing(sqlite3.connect(db_path)) as db, transaction(db):
+            return history.redo(db)
 
-def create_form_container(add_task_callback):
+    @staticmethod
+    def history_depth():
+        with closing(sqlite3.connect(db_path)) as db:
+            return history.depth(db)
+
+def create_form_container(add_task_callback, pick_due_callback):
     return Container(
         width=280,
         height=80,
@@ -76,6 +270,13 @@ def create_form_container(add_task_callback):
                     hint_text="Description...",
                     hint_style=TextStyle(size=11, color="black"),
                 ),
+                TextButton(
+                    "No due date",
+                    icon=icons.EVENT_ROUNDED,
+                    height=28,
+                    style=ButtonStyle(color={"": "black"}),
+                    on_click=pick_due_callback,
+                ),
                 IconButton(
                     content=Text("Add Task"),
                     width=180,
@@ -90,7 +291,10 @@ def create_form_container(add_task_callback):
         ),
     )
 
-def create_task_container(task, date, delete_callback, update_callback):
+def task_border(selected):
+    return border.all(1.5, "blue300") if selected else border.all(0.85, "white54")
+
+def create_task_container(task_id, task, date, delete_callback, update_callback, select_callback=None):
     def show_icons(e):
         icons_row = e.control.content.controls[1]
         opacity = 1 if e.data == "true" else 0
@@ -99,12 +303,15 @@ def create_task_container(task, date, delete_callback, update_callback):
         icons_row.update()
 
     # Pasamos el task_container como dato al IconButton para facilitar el acceso
+    # El id de la fila viaja en data para que las operaciones usen la clave primaria
     task_container = Container(
+        data=task_id,
         width=280,
         height=60,
-        border=border.all(0.85, "white54"),
+        border=task_border(False),
         border_radius=8,
         on_hover=show_icons,
+        on_click=lambda e: select_callback(task_container) if select_callback else None,
         clip_behavior=ClipBehavior.HARD_EDGE,
         padding=10,
         animate=200,
@@ -148,64 +355,415 @@ def create_task_container(task, date, delete_callback, update_callback):
     )
     return task_container
 
+def bind_task_container(task_container, task_id, task, date, selected=False):
+    texts = task_container.content.controls[0].controls
+    icons_row = task_container.content.controls[1]
+    task_container.data = task_id
+    task_container.height = 60
+    task_container.border = task_border(selected)
+    texts[0].value, texts[1].value = task, date
+    icons_row.controls[0].opacity = icons_row.controls[1].opacity = 0
+    return task_container
+
+class TaskFeed:
+    # Ventana deslizante sobre la tabla: solo max_live contenedores viven en
+    # el ListView, las páginas se piden por id a medida que se hace scroll y
+    # los contenedores que salen de la ventana se reutilizan. Con una búsqueda
+    # activa las páginas salen del índice FTS ordenadas por relevancia.
+    def __init__(self, list_view, delete_callback, update_callback, page_size=50, max_live=150, item_height=70):
+        self.list_view = list_view
+        self.delete_callback = delete_callback
+        self.update_callback = update_callback
+        self.page_size = page_size
+        self.max_live = max_live
+        self.item_height = item_height
+        self.at_head = True
+        self.exhausted = False
+        self.query = None
+        self.view = "all"
+        self.first_rank = 0
+        self.search_generation = 0
+        self.spare = []
+        self.selecting = False
+        self.selected = set()
+        self.on_selection_change = None
+        self.lock = threading.Lock()
+        list_view.on_scroll = self.handle_scroll
+
+    @property
+    def controls(self):
+        return self.list_view.controls
+
+    def make(self, task_id, task, created_at, due_at=None):
+        # La fecha se guarda como epoch y solo se formatea al pintar
+        date = format_task_date(created_at, due_at)
+        if self.spare:
+            return bind_task_container(self.spare.pop(), task_id, task, date, task_id in self.selected)
+        return create_task_container(
+            task_id, task, date, self.delete_callback, self.update_callback, self.toggle_selected
+        )
+
+    def recycle(self, containers):
+        # make() saca del final: se guardan al revés para que vuelvan en el
+        # mismo orden y show_rows deje cada contenedor en su lugar. Así el
+        # diff del ListView solo lleva los textos cambiados, no filas enteras.
+        self.spare.extend(reversed(containers[:self.page_size - len(self.spare)]))
+
+    def fetch_first(self, query):
+        if query:
+            return Database.search_tasks(query, 0, self.page_size, view=self.view)
+        return Database.read_page(None, self.page_size, self.view)
+
+    def fetch_older(self, before_id):
+        if self.query:
+            return Database.search_tasks(
+                self.query, self.first_rank + len(self.controls), self.page_size, view=self.view, before_id=before_id
+            )
+        return Database.read_page(before_id, self.page_size, self.view)
+
+    def fetch_newer(self):
+        if self.query:
+            offset = max(0, self.first_rank - self.page_size)
+            return Database.search_tasks_newer(self.query, offset, self.first_rank, self.controls[0].data, view=self.view)
+        return Database.read_page_after(self.controls[0].data, self.page_size, self.view)
+
+    def show_rows(self, rows):
+        self.recycle(self.controls[:])
+        self.controls[:] = [self.make(*row) for row in rows]
+        self.first_rank = 0
+        self.at_head = True
+        self.exhausted = len(rows) < self.page_size
+
+    def load_initial(self):
+        self.show_rows(self.fetch_first(self.query))
+
+    def search(self, text, generation):
+        # La consulta corre fuera del lock; si llegó otra tecla mientras tanto
+        # el resultado se descarta. scroll_to ya hace update(): las filas
+        # nuevas y el scroll viajan en un solo diff.
+        query = fts_query(text)
+        rows = self.fetch_first(query)
+        with self.lock:
+            if generation != self.search_generation:
+                return
+            self.query = query
+            self.show_rows(rows)
+            self.list_view.scroll_to(offset=0, duration=0)
+
+    def set_view(self, view):
+        with self.lock:
+            self.view = view
+            self.show_rows(self.fetch_first(self.query))
+            self.list_view.scroll_to(offset=0, duration=0)
+
+    def load_older(self):
+        if self.exhausted:
+            return
+        rows = self.fetch_older(self.controls[-1].data if self.controls else None)
+        self.exhausted = len(rows) < self.page_size
+        if not rows:
+            return
+        self.controls.extend(self.make(*row) for row in rows)
+        excess = len(self.controls) - self.max_live
+        if excess > 0:
+            self.recycle(self.controls[:excess])
+            del self.controls[:excess]
+            self.first_rank += excess
+            self.at_head = False
+        self.list_view.update()
+        if excess > 0:
+            self.list_view.scroll_to(delta=-excess * self.item_height, duration=0)
+
+    def load_newer(self):
+        if self.at_head or not self.controls:
+            return
+        rows = self.fetch_newer()
+        self.first_rank -= len(rows)
+        self.at_head = self.first_rank == 0 if self.query else len(rows) < self.page_size
+        if not rows:
+            return
+        self.controls[0:0] = [self.make(*row) for row in rows]
+        excess = len(self.controls) - self.max_live
+        if excess > 0:
+            self.recycle(self.controls[-excess:])
+            del self.controls[-excess:]
+            self.exhausted = False
+        self.list_view.update()
+        self.list_view.scroll_to(delta=len(rows) * self.item_height, duration=0)
+
+    def handle_scroll(self, e):
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            if e.pixels >= e.max_scroll_extent - 2 * self.item_height:
+                self.load_older()
+            elif e.pixels <= 2 * self.item_height:
+                self.load_newer()
+        finally:
+            self.lock.release()
+
+    def prepend(self, task_id, task, created_at, due_at=None):
+        with self.lock:
+            # Fuera de la vista completa la tarea nueva puede no pertenecer a
+            # la vista: se vuelve a pedir la primera página
+            if self.query or not self.at_head or self.view != "all":
+                self.query = None
+                self.load_initial()
+            else:
+                self.controls.insert(0, self.make(task_id, task, created_at, due_at))
+                if len(self.controls) > self.max_live:
+                    self.recycle([self.controls.pop()])
+                    self.exhausted = False
+            self.list_view.update()
+        self.list_view.scroll_to(offset=0, duration=200)
+
+    def remove(self, task_container):
+        with self.lock:
+            if task_container in self.controls:
+                self.controls.remove(task_container)
+                self.recycle([task_container])
+            self.list_view.update()
+
+    def remove_many(self, task_ids):
+        # No envía nada: quien llama agrupa todo en un único page.update
+        with self.lock:
+            oldest_id = self.controls[-1].data if self.controls else None
+            removed = [c for c in self.controls if c.data in task_ids]
+            self.controls[:] = [c for c in self.controls if c.data not in task_ids]
+            self.recycle(removed)
+            # Sin suficientes filas no hay scroll que dispare la carga siguiente
+            if len(self.controls) < self.page_size and not self.exhausted and oldest_id is not None:
+                rows = self.fetch_older(oldest_id)
+                self.exhausted = len(rows) < self.page_size
+                self.controls.extend(self.make(*row) for row in rows)
+
+    def restore(self, rows):
+        # Filas que vuelven por deshacer/rehacer. Solo se insertan las que caen
+        # dentro de la ventana cargada; el resto llegará con el scroll. Con una
+        # búsqueda o una vista activa no se sabe si encajan: se pide la página.
+        with self.lock:
+            if self.query or self.view != "all":
+                self.load_initial()
+                return
+            for row in rows:
+                ids = [c.data for c in self.controls]
+                if ids and row[0] < ids[-1] and not self.exhausted:
+                    continue
+                if ids and row[0] > ids[0] and not self.at_head:
+                    continue
+                position = next((i for i, task_id in enumerate(ids) if task_id < row[0]), len(ids))
+                self.controls.insert(position, self.make(*row))
+            excess = len(self.controls) - self.max_live
+            if excess > 0:
+                self.recycle(self.controls[-excess:])
+                del self.controls[-excess:]
+                self.exhausted = False
+
+    def rename(self, rows):
+        for task_container in self.controls:
+            for task_id, task in rows:
+                if task_container.data == task_id:
+                    task_container.content.controls[0].controls[0].value = task
+
+    def toggle_selected(self, task_container):
+        if not self.selecting:
+            return
+        self.selected ^= {task_container.data}
+        task_container.border = task_border(task_container.data in self.selected)
+        task_container.update()
+        if self.on_selection_change:
+            self.on_selection_change()
+
+    def set_selecting(self, selecting):
+        self.selecting = selecting
+        if not selecting and self.selected:
+            self.selected.clear()
+            for task_container in self.controls:
+                task_container.border = task_border(False)
+
 def main(page: Page):
     page.vertical_alignment = MainAxisAlignment.CENTER
     page.horizontal_alignment = CrossAxisAlignment.CENTER
 
+    due = {"at": None}
+
     def add_task(e):
-        date_time = datetime.now().strftime("%b %d, %Y  %H:%M")
+        created_at = int(time.time())
         task_text = form.content.controls[0].value
         if task_text:
-            Database.insert_into_database((task_text, date_time))
-            main_column.controls.append(
-                create_task_container(task_text, date_time, delete_task, update_task)
-            )
-            main_column.update()
+            task_id = Database.insert_into_database((task_text, created_at, due["at"]))
+            if search_field.value:
+                feed.search_generation += 1
+                search_field.value = ""
+                search_field.update()
+            feed.prepend(task_id, task_text, created_at, due["at"])
+            history_changed()
             toggle_form(e)
 
+    def pick_due(e):
+        page.open(due_picker)
+
+    def due_picked(e):
+        # Vence al final del día elegido, en hora local
+        due["at"] = int(due_picker.value.replace(hour=23, minute=59, second=59).timestamp())
+        set_due_label()
+        form.update()
+
+    def set_due_label():
+        due_button = form.content.controls[1]
+        due_button.text = datetime.fromtimestamp(due["at"]).strftime("Due %b %d, %Y") if due["at"] else "No due date"
+
+    def view_changed(e):
+        feed.set_view(json.loads(e.data)[0])
+
     def delete_task(e, task_container):
-        task_text = task_container.content.controls[0].controls[0].value
-        Database.delete_task_from_database(task_text)
+        Database.delete_task_from_database(task_container.data)
         task_container.height = 0
         task_container.update()
-        time.sleep(0.2)
-        main_column.controls.remove(task_container)
-        main_column.update()
+        history_changed()
+        # La animación termina en segundo plano, el handler no se bloquea
+        page.run_task(remove_after_animation, task_container)
+
+    async def remove_after_animation(task_container):
+        await asyncio.sleep(0.2)
+        feed.remove(task_container)
+
+    def search_changed(e):
+        feed.search_generation += 1
+        page.run_task(debounced_search, feed.search_generation, e.control.value)
+
+    async def debounced_search(generation, text):
+        await asyncio.sleep(SEARCH_DEBOUNCE)
+        if generation == feed.search_generation:
+            await asyncio.to_thread(feed.search, text, generation)
+
+    def toggle_selecting(e):
+        feed.set_selecting(not feed.selecting)
+        update_selection_actions()
+        page.update(task_list, header)
+
+    def update_selection_actions():
+        select_button.selected = feed.selecting
+        delete_selected_button.visible = feed.selecting
+        delete_selected_button.disabled = not feed.selected
+        delete_selected_button.tooltip = f"Delete {len(feed.selected)} selected"
+
+    def on_selection_change():
+        update_selection_actions()
+        header.update()
+
+    def delete_selected(e):
+        task_ids = set(feed.selected)
+        Database.delete_tasks_from_database(task_ids)
+        feed.remove_many(task_ids)
+        feed.set_selecting(False)
+        update_selection_actions()
+        refresh_history_buttons()
+        page.update(task_list, header)
+
+    def step_history(step):
+        command = step()
+        if command is None:
+            return
+        op, args = command
+        if op == "insert":
+            feed.restore(args)
+        elif op == "delete":
+            feed.remove_many(set(args))
+        else:
+            feed.rename(args)
+        refresh_history_buttons()
+        page.update(task_list, header)
+
+    def refresh_history_buttons():
+        undo_depth, redo_depth = Database.history_depth()
+        undo_button.disabled = undo_depth == 0
+        redo_button.disabled = redo_depth == 0
+
+    def history_changed():
+        refresh_history_buttons()
+        header.update()
+
+    def keyboard_shortcut(e):
+        # Con un campo de texto enfocado Ctrl+Z es del texto, no de la base:
+        # ahí el atajo se ignora y quedan los botones
+        if focused_fields:
+            return
+        if (e.ctrl or e.meta) and e.key.upper() == "Z":
+            step_history(Database.redo if e.shift else Database.undo)
+        elif (e.ctrl or e.meta) and e.key.upper() == "Y":
+            step_history(Database.redo)
 
     def update_task(e, task_container):
-        form.height, form.opacity = 200, 1
+        form.height, form.opacity = 230, 1
         form.content.controls[0].value = task_container.content.controls[0].controls[0].value
-        form.content.controls[1].content.value = "Update Task"
-        form.content.controls[1].on_click = lambda e: finalize_update(task_container)
+        form.content.controls[1].visible = False
+        form.content.controls[2].content.value = "Update Task"
+        form.content.controls[2].on_click = lambda e: finalize_update(task_container)
         form.update()
 
     def finalize_update(task_container):
-        old_task = task_container.content.controls[0].controls[0].value
         new_task = form.content.controls[0].value
-        Database.update_task_in_database(old_task, new_task)
+        Database.update_task_in_database(task_container.data, new_task)
         task_container.content.controls[0].controls[0].value = new_task
         task_container.update()
+        history_changed()
         toggle_form(None)
 
     def toggle_form(e):
-        if form.height != 200:
-            form.height, form.opacity = 200, 1
+        if form.height != 230:
+            form.height, form.opacity = 230, 1
         else:
             form.height, form.opacity = 80, 0
             form.content.controls[0].value = ""
-            form.content.controls[1].content.value = "Add Task"
-            form.content.controls[1].on_click = add_task
+            form.content.controls[2].content.value = "Add Task"
+            form.content.controls[2].on_click = add_task
+            due["at"] = None
+            set_due_label()
+            form.content.controls[1].visible = True
         form.update()
 
-    main_column = Column(
-        scroll=ScrollMode.HIDDEN,
-        expand=True,
-        alignment=MainAxisAlignment.START,
+    task_list = ListView(expand=True, spacing=10, on_scroll_interval=100)
+    feed = TaskFeed(task_list, delete_task, update_task)
+    feed.on_selection_change = on_selection_change
+
+    undo_button = IconButton(
+        icons.UNDO_ROUNDED,
+        icon_size=18,
+        tooltip="Undo",
+        on_click=lambda e: step_history(Database.undo),
+    )
+    redo_button = IconButton(
+        icons.REDO_ROUNDED,
+        icon_size=18,
+        tooltip="Redo",
+        on_click=lambda e: step_history(Database.redo),
+    )
+    select_button = IconButton(
+        icons.CHECKLIST_ROUNDED,
+        icon_size=18,
+        selected_icon_color="blue300",
+        on_click=toggle_selecting,
+    )
+    delete_selected_button = IconButton(
+        icons.DELETE_SWEEP_ROUNDED,
+        icon_size=18,
+        icon_color="red700",
+        visible=False,
+        disabled=True,
+        on_click=delete_selected,
+    )
+    header = Row(
+        alignment=MainAxisAlignment.SPACE_BETWEEN,
         controls=[
+            Text("To-Do Items", size=18, weight=FontWeight.BOLD),
             Row(
-                alignment=MainAxisAlignment.SPACE_BETWEEN,
+                spacing=0,
                 controls=[
-                    Text("To-Do Items", size=18, weight=FontWeight.BOLD),
+                    delete_selected_button,
+                    undo_button,
+                    redo_button,
+                    select_button,
                     IconButton(
                         icons.ADD_CIRCLE_ROUNDED,
                         icon_size=18,
@@ -213,11 +771,45 @@ def main(page: Page):
                     ),
                 ],
             ),
+        ],
+    )
+
+    search_field = TextField(
+        height=36,
+        text_size=12,
+        border_radius=8,
+        border_color="white24",
+        content_padding=padding.symmetric(horizontal=10),
+        prefix_icon=icons.SEARCH_ROUNDED,
+        hint_text="Search...",
+        hint_style=TextStyle(size=11, color="white54"),
+        on_change=search_changed,
+    )
+
+    view_selector = SegmentedButton(
+        selected={"all"},
+        show_selected_icon=False,
+        on_change=view_changed,
+        segments=[
+            Segment(value=value, label=Text(label, size=10))
+            for value, label in (("all", "All"), ("today", "Today"), ("week", "Week"), ("overdue", "Overdue"))
+        ],
+    )
+    due_picker = DatePicker(on_change=due_picked)
+
+    main_column = Column(
+        expand=True,
+        alignment=MainAxisAlignment.START,
+        controls=[
+            header,
+            search_field,
+            view_selector,
             Divider(height=8, color="white24"),
+            task_list,
         ],
     )
 
-    form = create_form_container(add_task)
+    form = create_form_container(add_task, pick_due)
     
     page.add(
         Container(
@@ -256,9 +848,15 @@ def main(page: Page):
         )
     )
 
+    focused_fields = set()
+    for field in (search_field, form.content.controls[0]):
+        field.on_focus = lambda e, field=field: focused_fields.add(field)
+        field.on_blur = lambda e, field=field: focused_fields.discard(field)
+    page.on_keyboard_event = keyboard_shortcut
+
     Database.connect_to_database()
-    for task, date in Database.read_database()[::-1]:
-        main_column.controls.append(create_task_container(task, date, delete_task, update_task))
+    feed.load_initial()
+    refresh_history_buttons()
     page.update()
 
 if __name__ == "__main__":